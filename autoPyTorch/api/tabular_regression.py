@@ -45,7 +45,9 @@ class TabularRegressionTask(BaseTask):
             Models are drawn with replacement.
         ensemble_nbest (int: default=50):
             Only consider the ensemble_nbest
-            models to build the ensemble
+            models to build the ensemble.
+            At most as many models are considered as fit their predictions
+            into half of the memory limit of the ensemble builder
         max_models_on_disc (int: default=50):
             Maximum number of models saved to disc.
             Also, controls the size of the ensemble
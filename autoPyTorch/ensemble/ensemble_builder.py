@@ -1,46 +1,68 @@
 # -*- encoding: utf-8 -*-
-import glob
+import errno
 import gzip
+import heapq
+import json
 import logging
 import logging.handlers
 import math
 import multiprocessing
 import numbers
+import operator
 import os
-import pickle
-import re
 import shutil
+import threading
 import time
 import traceback
+import uuid
 import zlib
-from typing import Dict, List, Optional, Set, Tuple, Union
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from typing import IO, TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
 
 import dask.distributed
 
 import numpy as np
 
-import pandas as pd
-
-import pynisher
-
 from sklearn.utils.validation import check_random_state
 
 from smac.callbacks import IncorporateRunResultCallback
-from smac.optimizer.smbo import SMBO
-from smac.runhistory.runhistory import RunInfo, RunValue
 
 from autoPyTorch.automl_common.common.utils.backend import Backend
 from autoPyTorch.constants import BINARY
 from autoPyTorch.ensemble.abstract_ensemble import AbstractEnsemble
 from autoPyTorch.ensemble.ensemble_selection import EnsembleSelection
 from autoPyTorch.pipeline.components.training.metrics.base import autoPyTorchMetric
-from autoPyTorch.pipeline.components.training.metrics.utils import calculate_loss, calculate_score
-from autoPyTorch.utils.logging_ import get_named_client_logger
+from autoPyTorch.pipeline.components.training.metrics.utils import (
+    calculate_loss,
+    calculate_score,
+    get_accuracy_labels,
+)
+from autoPyTorch.utils.logging_ import PicklableClientLogger, get_named_client_logger
 from autoPyTorch.utils.parallel import preload_modules
 
+try:
+    # Faster drop-in replacement for gzip, used to decompress predictions if installed
+    from isal import igzip
+    isal_installed = True
+except ModuleNotFoundError:
+    isal_installed = False
+
+if TYPE_CHECKING:
+    from smac.optimizer.smbo import SMBO
+    from smac.runhistory.runhistory import RunInfo, RunValue
+
 Y_ENSEMBLE = 0
 Y_TEST = 1
 
+# Number of iterations whose changes to the read losses are journaled before a new snapshot
+MAX_LOSSES_JOURNAL_LENGTH = 10
+
+# Threads used to read predictions
+MAX_THREADS = 4
+# Threads used to remove the directories of deleted models
+MAX_DELETE_THREADS = 2
+
 MODEL_FN_RE = r'_([0-9]*)_([0-9]*)_([0-9]+\.*[0-9]*)\.npy'
 
 
@@ -91,6 +113,8 @@ class EnsembleBuilderManager(IncorporateRunResultCallback):
                 if float: consider only this fraction of the best models
                 Both wrt to validation predictions
                 If performance_range_threshold > 0, might return less models
+                If memory_limit is set, at most as many models are considered
+                as fit their predictions into half of the memory limit
             max_models_on_disc: Union[float, int]
                 Defines the maximum number of models that are kept in the disc.
                 If int, it must be greater or equal than 1, and dictates the max number of
@@ -144,6 +168,7 @@ class EnsembleBuilderManager(IncorporateRunResultCallback):
         self.random_state = random_state
         self.logger_port = logger_port
         self.pynisher_context = pynisher_context
+        self._logger: Optional[PicklableClientLogger] = None
 
         # Store something similar to SMAC's runhistory
         self.history: List[Dict[str, float]] = []
@@ -157,11 +182,27 @@ class EnsembleBuilderManager(IncorporateRunResultCallback):
         # Keep track of when we started to know when we need to finish!
         self.start_time = time.time()
 
+    @property
+    def logger(self) -> PicklableClientLogger:
+        """The logger of the ensemble builder, created once on first use."""
+        if self._logger is None:
+            self._logger = get_named_client_logger(
+                name='EnsembleBuilder',
+                port=self.logger_port,
+            )
+        return self._logger
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The logger is created again on first use after unpickling
+        state = self.__dict__.copy()
+        state['_logger'] = None
+        return state
+
     def __call__(
         self,
         smbo: 'SMBO',
-        run_info: RunInfo,
-        result: RunValue,
+        run_info: 'RunInfo',
+        result: 'RunValue',
         time_left: float,
     ) -> None:
         self.build_ensemble(smbo.tae_runner.client)
@@ -175,10 +216,7 @@ class EnsembleBuilderManager(IncorporateRunResultCallback):
         # The second criteria is elapsed time
         elapsed_time = time.time() - self.start_time
 
-        logger = get_named_client_logger(
-            name='EnsembleBuilder',
-            port=self.logger_port,
-        )
+        logger = self.logger
 
         # First test for termination conditions
         if self.time_left_for_ensembles < elapsed_time:
@@ -318,6 +356,8 @@ def fit_and_return_ensemble(
             if float: consider only this fraction of the best models
             Both wrt to validation predictions
             If performance_range_threshold > 0, might return less models
+            If memory_limit is set, at most as many models are considered
+            as fit their predictions into half of the memory limit
         max_models_on_disc: int
            Defines the maximum number of models that are kept in the disc.
            If int, it must be greater or equal than 1, and dictates the max number of
@@ -428,6 +468,8 @@ class EnsembleBuilder(object):
                 if float: consider only this fraction of the best models
                 Both wrt to validation predictions
                 If performance_range_threshold > 0, might return less models
+                If memory_limit is set, at most as many models are considered
+                as fit their predictions into half of the memory limit
             max_models_on_disc: Union[float, int]
                Defines the maximum number of models that are kept in the disc.
                If int, it must be greater or equal than 1, and dictates the max number of
@@ -504,21 +546,17 @@ class EnsembleBuilder(object):
         self.random_state = check_random_state(random_state)
         self.unit_test = unit_test
 
-        # Setup the logger
+        # The logger is set up on first use, see the logger property
         self.logger_port = logger_port
-        self.logger = get_named_client_logger(
-            name='EnsembleBuilder',
-            port=self.logger_port,
-        )
+        self._logger: Optional[PicklableClientLogger] = None
 
         if ensemble_nbest == 1:
             self.logger.debug("Behaviour depends on int/float: %s, %s (ensemble_nbest, type)" %
                               (ensemble_nbest, type(ensemble_nbest)))
 
         self.start_time = 0.0
-        self.model_fn_re = re.compile(MODEL_FN_RE)
 
-        self.last_hash = None  # hash of ensemble training data
+        self.last_hash: Optional[int] = None  # hash of ensemble training data
         self.y_true_ensemble = None
         self.SAVE2DISC = True
 
@@ -541,6 +579,12 @@ class EnsembleBuilder(object):
         #    }
         # }
         self.read_preds = {}
+        # {"file_name": (shape, dtype, fortran_order, offset)}
+        self._npy_header_cache: Dict[str, Tuple[Tuple[int, ...], np.dtype, bool, int]] = {}
+        # {("file_name", mtime_ns): decoded predictions of a .npy.gz file}
+        self._gz_cache: 'OrderedDict[Tuple[str, int], np.ndarray]' = OrderedDict()
+        self._gz_cache_nbytes = 0
+        self._gz_cache_lock = threading.Lock()
 
         # Depending on the dataset dimensions,
         # regenerating every iteration, the predictions
@@ -550,15 +594,16 @@ class EnsembleBuilder(object):
         # (every time the ensemble builder gets resources
         # from dask, it builds this object from scratch)
         # we save the state of this dictionary to memory
-        # and read it if available
+        # and read it if available. Every array is kept as a raw
+        # .npy file in this directory, so it can be mapped back
+        # into memory instead of being unpickled
         self.ensemble_memory_file = os.path.join(
             self.backend.internals_directory,
-            'ensemble_read_preds.pkl'
+            'ensemble_read_preds'
         )
         if os.path.exists(self.ensemble_memory_file):
             try:
-                with (open(self.ensemble_memory_file, "rb")) as memory:
-                    self.read_preds, self.last_hash = pickle.load(memory)
+                self.read_preds, self.last_hash = self._load_read_preds(self.ensemble_memory_file)
             except Exception as e:
                 self.logger.warning(
                     "Could not load the previous iterations of ensemble_builder predictions."
@@ -567,15 +612,28 @@ class EnsembleBuilder(object):
                         traceback.format_exc(),
                     )
                 )
+        # The losses are stored column-wise (one array per field) in a .npz file,
+        # which is restored with a single read instead of unpickling one dict per model.
+        # The entries changed by later iterations are appended to a journal
         self.ensemble_loss_file = os.path.join(
             self.backend.internals_directory,
-            'ensemble_read_losses.pkl'
+            'ensemble_read_losses.npz'
         )
+        self.ensemble_loss_journal = os.path.join(
+            self.backend.internals_directory,
+            'ensemble_read_losses.jsonl'
+        )
+        self._journal_length = 0
+        # Identifies the snapshot that the lines of the journal apply to
+        self._snapshot_id = ''
         if os.path.exists(self.ensemble_loss_file):
             try:
-                with (open(self.ensemble_loss_file, "rb")) as memory:
-                    self.read_losses = pickle.load(memory)
+                self.read_losses, self._journal_length, self._snapshot_id = self._load_read_losses(
+                    self.ensemble_loss_file, self.ensemble_loss_journal
+                )
             except Exception as e:
+                # A new snapshot replaces the unreadable one at the next save
+                self._journal_length = MAX_LOSSES_JOURNAL_LENGTH
                 self.logger.warning(
                     "Could not load the previous iterations of ensemble_builder losses."
                     "This might impact the quality of the run. Exception={} {}".format(
@@ -583,22 +641,64 @@ class EnsembleBuilder(object):
                         traceback.format_exc(),
                     )
                 )
+        # The losses as they are stored, to find the entries changed since
+        self._stored_losses = {k: dict(v) for k, v in self.read_losses.items()}
 
         # hidden feature which can be activated via an environment variable. This keeps all
         # models and predictions which have ever been a candidate. This is necessary to post-hoc
         # compute the whole ensemble building trajectory.
         self._has_been_candidate: Set[str] = set()
 
+        # Removals of the directories of deleted models, which run in the background
+        # if threads can be used, see _map_prediction_files
+        self._delete_pool = self._create_delete_pool()
+        self._pending_deletions: List[Future] = []
+
         self.validation_performance_ = np.inf
 
         # Track the ensemble performance
-        self.y_test = None
-        datamanager = self.backend.load_datamanager()
-        if datamanager.test_tensors is not None:
-            self.y_test = datamanager.test_tensors[1]
-        del datamanager
+        self.y_test = self._load_y_test(os.path.join(
+            self.backend.internals_directory,
+            'ensemble_y_test.npy'
+        ))
         self.ensemble_history: List[Dict[str, float]] = []
 
+    @property
+    def logger(self) -> PicklableClientLogger:
+        """The logger of the ensemble builder, created once on first use."""
+        if self._logger is None:
+            self._logger = get_named_client_logger(
+                name='EnsembleBuilder',
+                port=self.logger_port,
+            )
+        return self._logger
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The logger is created again on first use after unpickling. The decoded
+        # predictions are not sent along and neither a lock nor a thread pool can be pickled
+        state = self.__dict__.copy()
+        state['_logger'] = None
+        state['_gz_cache'] = OrderedDict()
+        state['_gz_cache_nbytes'] = 0
+        state['_pending_deletions'] = []
+        del state['_gz_cache_lock']
+        del state['_delete_pool']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._gz_cache_lock = threading.Lock()
+        self._delete_pool = self._create_delete_pool()
+
+    def _create_delete_pool(self) -> Optional[ThreadPoolExecutor]:
+        """
+            Returns the thread pool that removes the directories of deleted
+            models, or None if they are removed in the calling thread.
+        """
+        if self.memory_limit is not None:
+            return None
+        return self._start_thread_pool(MAX_DELETE_THREADS)
+
     def run(
         self,
         iteration: int,
@@ -648,10 +748,11 @@ class EnsembleBuilder(object):
         elif time_left is not None and end_at is not None:
             raise ValueError('Cannot provide both time_left and end_at.')
 
-        self.logger = get_named_client_logger(
-            name='EnsembleBuilder',
-            port=self.logger_port,
-        )
+        # Only the process which enforces the limits needs pynisher
+        import pynisher
+
+        context = multiprocessing.get_context(pynisher_context)
+        preload_modules(context)
 
         process_start_time = time.time()
         while True:
@@ -671,8 +772,6 @@ class EnsembleBuilder(object):
             wall_time_in_s = int(time_left - time_buffer)
             if wall_time_in_s < 1:
                 break
-            context = multiprocessing.get_context(pynisher_context)
-            preload_modules(context)
 
             safe_ensemble_script = pynisher.enforce_limits(
                 wall_time_in_s=wall_time_in_s,
@@ -687,7 +786,7 @@ class EnsembleBuilder(object):
 
                 # ATTENTION: main will start from scratch; # all data structures are empty again
                 try:
-                    os.remove(self.ensemble_memory_file)
+                    shutil.rmtree(self.ensemble_memory_file)
                 except:  # noqa E722
                     pass
 
@@ -769,14 +868,6 @@ class EnsembleBuilder(object):
                 The train prediction from the current ensemble.
         """
 
-        # Pynisher jobs inside dask 'forget'
-        # the logger configuration. So we have to set it up
-        # accordingly
-        self.logger = get_named_client_logger(
-            name='EnsembleBuilder',
-            port=self.logger_port,
-        )
-
         self.start_time = time.time()
         train_pred, test_pred = None, None
 
@@ -835,8 +926,7 @@ class EnsembleBuilder(object):
             self._delete_excess_models(selected_keys=candidate_models)
 
         # Save the read losses status for the next iteration
-        with open(self.ensemble_loss_file, "wb") as memory:
-            pickle.dump(self.read_losses, memory)
+        self._save_read_losses()
 
         if ensemble is not None:
             train_pred = self.predict(set_="train",
@@ -858,27 +948,60 @@ class EnsembleBuilder(object):
                 test_pred
             )
 
+            if self._drop_non_members(ensemble, candidate_models):
+                self._save_read_losses()
+
         # The loaded predictions and the hash can only be saved after the ensemble has been
         # built, because the hash is computed during the construction of the ensemble
-        with open(self.ensemble_memory_file, "wb") as memory:
-            pickle.dump((self.read_preds, self.last_hash), memory)
+        self._save_read_preds(self.ensemble_memory_file)
+        self._wait_for_deletions()
 
         if return_predictions:
             return self.ensemble_history, self.ensemble_nbest, train_pred, test_pred
         else:
             return self.ensemble_history, self.ensemble_nbest, None, None
 
+    @staticmethod
+    def _parse_model_fn(pred_path: str) -> Optional[Tuple[int, int, float]]:
+        """
+        Extracts the identifier of a model from the name of one of its prediction
+        files, which follows MODEL_FN_RE, i.e. <prefix>_<seed>_<num_run>_<budget>.npy
+        optionally followed by .gz. As the format is fixed, the name is split
+        instead of matching the regular expression.
+
+        Parameters
+        ----------
+        pred_path: str
+            path to a prediction file
+
+        Returns
+        -------
+        Optional[Tuple[int, int, float]]
+            the seed, num_run and budget of the model, or None if the
+            name does not follow the expected format
+        """
+        name = os.path.basename(pred_path)
+        if name.endswith('.gz'):
+            name = name[:-3]
+        if not name.endswith('.npy'):
+            return None
+        parts = name[:-4].rsplit('_', 3)
+        if len(parts) != 4:
+            return None
+        try:
+            return int(parts[1]), int(parts[2]), float(parts[3])
+        except ValueError:
+            return None
+
     def get_disk_consumption(self, pred_path: str) -> float:
         """
         gets the cost of a model being on disc
         """
 
-        match = self.model_fn_re.search(pred_path)
-        if not match:
+        identifier = self._parse_model_fn(pred_path)
+        if identifier is None:
             raise ValueError("Invalid path format %s" % pred_path)
-        _seed = int(match.group(1))
-        _num_run = int(match.group(2))
-        _budget = float(match.group(3))
+        _seed, _num_run, _budget = identifier
 
         stored_files_for_run = os.listdir(
             self.backend.get_numrun_directory(_seed, _num_run, _budget))
@@ -890,6 +1013,62 @@ class EnsembleBuilder(object):
         # get the megabytes
         return round(this_model_cost / math.pow(1024, 2), 2)
 
+    def _scan_pred_dir(self) -> Dict[str, float]:
+        """
+        Lists the predictions on the ensemble data set of every run of this seed,
+        that is, runs/<seed>_*_*/predictions_ensemble_<seed>_*_*.npy[.gz], together
+        with their modification time.
+
+        The run directories are listed with os.scandir, which returns the names
+        and types of all entries of a directory at once. Only the matching
+        prediction files are stat'ed, a single time. A run holds a single
+        prediction file on the ensemble data set, so for runs that were already
+        scored the known file is stat'ed directly instead of listing the run.
+
+        Returns
+        -------
+        Dict[str, float]
+            the modification time of every prediction file, keyed by its path
+        """
+        run_prefix = '%d_' % self.seed
+        pred_prefix = 'predictions_ensemble_%s_' % self.seed
+
+        y_ens_mtimes: Dict[str, float] = {}
+        try:
+            runs = list(os.scandir(self.backend.get_runs_directory()))
+        except FileNotFoundError:
+            return y_ens_mtimes
+
+        known_files = {os.path.dirname(y_ens_fn): y_ens_fn for y_ens_fn in self.read_losses}
+
+        for run in runs:
+            if (
+                not run.name.startswith(run_prefix)
+                or '_' not in run.name[len(run_prefix):]
+                or not run.is_dir()
+            ):
+                continue
+            known_fn = known_files.get(run.path)
+            if known_fn is not None:
+                try:
+                    y_ens_mtimes[known_fn] = os.stat(known_fn).st_mtime
+                    continue
+                except FileNotFoundError:
+                    # The prediction was replaced or deleted, list the run
+                    pass
+            try:
+                with os.scandir(run.path) as entries:
+                    for entry in entries:
+                        if (
+                            entry.name.startswith(pred_prefix)
+                            and (entry.name.endswith('.npy') or entry.name.endswith('.npy.gz'))
+                        ):
+                            y_ens_mtimes[entry.path] = entry.stat().st_mtime
+            except FileNotFoundError:
+                # The run was deleted while scanning
+                continue
+        return y_ens_mtimes
+
     def compute_loss_per_model(self) -> bool:
         """
             Compute the loss of the predictions on ensemble building data set;
@@ -908,124 +1087,335 @@ class EnsembleBuilder(object):
                 )
                 return False
 
-        pred_path = os.path.join(
-            glob.escape(self.backend.get_runs_directory()),
-            '%d_*_*' % self.seed,
-            'predictions_ensemble_%s_*_*.npy*' % self.seed,
-        )
-        y_ens_files = glob.glob(pred_path)
-        y_ens_files = [y_ens_file for y_ens_file in y_ens_files
-                       if y_ens_file.endswith('.npy') or y_ens_file.endswith('.npy.gz')]
-        self.y_ens_files = y_ens_files
+        y_ens_mtimes = self._scan_pred_dir()
+        self.y_ens_files = list(y_ens_mtimes.keys())
         # no validation predictions so far -- no files
         if len(self.y_ens_files) == 0:
             self.logger.debug("Found no prediction files on ensemble data set:"
-                              " %s" % pred_path)
+                              " %s" % os.path.join(
+                                  self.backend.get_runs_directory(),
+                                  '%d_*_*' % self.seed,
+                                  'predictions_ensemble_%s_*_*.npy*' % self.seed,
+                              ))
             return False
 
         # First sort files chronologically
         to_read = []
-        for y_ens_fn in self.y_ens_files:
-            match = self.model_fn_re.search(y_ens_fn)
-            if match is None:
+        for y_ens_fn, mtime_ens in y_ens_mtimes.items():
+            # self.read_losses memoizes the loss of every model, keyed by its prediction
+            # file, which already determines seed, num_run and budget. As long as the
+            # modification time of the file did not change, neither the identifier of the
+            # model nor its loss need to be computed again
+            if (
+                y_ens_fn in self.read_losses
+                and self.read_losses[y_ens_fn]["mtime_ens"] == mtime_ens
+            ):
+                if not self.read_preds.get(y_ens_fn):
+                    self.read_preds[y_ens_fn] = {
+                        Y_ENSEMBLE: None,
+                        Y_TEST: None,
+                    }
+                continue
+
+            identifier = self._parse_model_fn(y_ens_fn)
+            if identifier is None:
                 raise ValueError(f"Could not interpret file {y_ens_fn} "
                                  "Something went wrong while scoring predictions")
-            _seed = int(match.group(1))
-            _num_run = int(match.group(2))
-            _budget = float(match.group(3))
+            _seed, _num_run, _budget = identifier
 
-            to_read.append([y_ens_fn, match, _seed, _num_run, _budget])
+            to_read.append([y_ens_fn, _seed, _num_run, _budget])
 
         n_read_files = 0
         # Now read file wrt to num_run
         # Mypy assumes sorted returns an object because of the lambda. Can't get to recognize the list
         # as a returning list, so as a work-around we skip next line
-        for y_ens_fn, match, _seed, _num_run, _budget in sorted(to_read, key=lambda x: x[3]):  # type: ignore
-            if self.read_at_most and n_read_files >= self.read_at_most:
-                # limit the number of files that will be read
-                # to limit memory consumption
-                break
+        candidates = iter(sorted(to_read, key=lambda x: x[2]))  # type: ignore
+        while not self.read_at_most or n_read_files < self.read_at_most:
+            # Collect the next batch of files to read. As files that fail to load do
+            # not count towards read_at_most, this is repeated until enough files were
+            # read or no candidate is left
+            batch = []
+            for y_ens_fn, _seed, _num_run, _budget in candidates:
+                if not y_ens_fn.endswith(".npy") and not y_ens_fn.endswith(".npy.gz"):
+                    self.logger.info('Error loading file (not .npy or .npy.gz): %s', y_ens_fn)
+                    continue
 
-            if not y_ens_fn.endswith(".npy") and not y_ens_fn.endswith(".npy.gz"):
-                self.logger.info('Error loading file (not .npy or .npy.gz): %s', y_ens_fn)
-                continue
+                if not self.read_losses.get(y_ens_fn):
+                    self.read_losses[y_ens_fn] = {
+                        "ens_loss": np.inf,
+                        "mtime_ens": 0,
+                        "mtime_test": 0,
+                        "seed": _seed,
+                        "num_run": _num_run,
+                        "budget": _budget,
+                        "disc_space_cost_mb": None,
+                        # Lazy keys so far:
+                        # 0 - not loaded
+                        # 1 - loaded and in memory
+                        # 2 - loaded but dropped again
+                        # 3 - deleted from disk due to space constraints
+                        "loaded": 0
+                    }
+                if not self.read_preds.get(y_ens_fn):
+                    self.read_preds[y_ens_fn] = {
+                        Y_ENSEMBLE: None,
+                        Y_TEST: None,
+                    }
+
+                if self.read_losses[y_ens_fn]["mtime_ens"] == y_ens_mtimes[y_ens_fn]:
+                    # same time stamp; nothing changed;
+                    continue
 
-            if not self.read_losses.get(y_ens_fn):
-                self.read_losses[y_ens_fn] = {
-                    "ens_loss": np.inf,
-                    "mtime_ens": 0,
-                    "mtime_test": 0,
-                    "seed": _seed,
-                    "num_run": _num_run,
-                    "budget": _budget,
-                    "disc_space_cost_mb": None,
-                    # Lazy keys so far:
-                    # 0 - not loaded
-                    # 1 - loaded and in memory
-                    # 2 - loaded but dropped again
-                    # 3 - deleted from disk due to space constraints
-                    "loaded": 0
-                }
-            if not self.read_preds.get(y_ens_fn):
-                self.read_preds[y_ens_fn] = {
-                    Y_ENSEMBLE: None,
-                    Y_TEST: None,
-                }
-
-            if self.read_losses[y_ens_fn]["mtime_ens"] == os.path.getmtime(y_ens_fn):
-                # same time stamp; nothing changed;
-                continue
+                batch.append(y_ens_fn)
+                if self.read_at_most and n_read_files + len(batch) >= self.read_at_most:
+                    # limit the number of files that will be read
+                    # to limit memory consumption
+                    break
 
-            # actually read the predictions and compute their respective loss
-            try:
-                y_ensemble = self._read_np_fn(y_ens_fn)
-                losses = calculate_loss(
-                    metrics=self.metrics,
-                    target=self.y_true_ensemble,
-                    prediction=y_ensemble,
-                    task_type=self.task_type,
-                    **self.metric_kwargs
-                )
+            if len(batch) == 0:
+                break
 
-                if np.isfinite(self.read_losses[y_ens_fn]["ens_loss"]):
-                    self.logger.debug(
-                        'Changing ensemble loss for file %s from %f to %f '
-                        'because file modification time changed? %f - %f',
-                        y_ens_fn,
-                        self.read_losses[y_ens_fn]["ens_loss"],
-                        losses[self.opt_metric],
-                        self.read_losses[y_ens_fn]["mtime_ens"],
-                        os.path.getmtime(y_ens_fn),
-                    )
+            # actually read the predictions and compute their respective loss
+            for y_ens_fn, future in self._compute_losses(batch):
+                try:
+                    loss = future.result()
+
+                    if np.isfinite(self.read_losses[y_ens_fn]["ens_loss"]):
+                        self.logger.debug(
+                            'Changing ensemble loss for file %s from %f to %f '
+                            'because file modification time changed? %f - %f',
+                            y_ens_fn,
+                            self.read_losses[y_ens_fn]["ens_loss"],
+                            loss,
+                            self.read_losses[y_ens_fn]["mtime_ens"],
+                            y_ens_mtimes[y_ens_fn],
+                        )
 
-                self.read_losses[y_ens_fn]["ens_loss"] = losses[self.opt_metric]
+                    self.read_losses[y_ens_fn]["ens_loss"] = loss
 
-                # It is not needed to create the object here
-                # To save memory, we just compute the loss.
-                self.read_losses[y_ens_fn]["mtime_ens"] = os.path.getmtime(y_ens_fn)
-                self.read_losses[y_ens_fn]["loaded"] = 2
-                self.read_losses[y_ens_fn]["disc_space_cost_mb"] = self.get_disk_consumption(
-                    y_ens_fn
-                )
+                    # It is not needed to create the object here
+                    # To save memory, we just compute the loss.
+                    # The modification time is the one seen by the scan: should
+                    # the file change after it, it is read again next iteration
+                    self.read_losses[y_ens_fn]["mtime_ens"] = y_ens_mtimes[y_ens_fn]
+                    self.read_losses[y_ens_fn]["loaded"] = 2
+                    self.read_losses[y_ens_fn]["disc_space_cost_mb"] = self.get_disk_consumption(
+                        y_ens_fn
+                    )
 
-                n_read_files += 1
+                    n_read_files += 1
 
-            except Exception:
-                self.logger.warning(
-                    'Error loading %s: %s',
-                    y_ens_fn,
-                    traceback.format_exc(),
-                )
-                self.read_losses[y_ens_fn]["ens_loss"] = np.inf
+                except Exception:
+                    self.logger.warning(
+                        'Error loading %s: %s',
+                        y_ens_fn,
+                        traceback.format_exc(),
+                    )
+                    self.read_losses[y_ens_fn]["ens_loss"] = np.inf
 
         self.logger.debug(
             'Done reading %d new prediction files. Loaded %d predictions in '
             'total.',
             n_read_files,
-            np.sum([pred["loaded"] > 0 for pred in self.read_losses.values()])
+            sum(1 for pred in self.read_losses.values() if pred["loaded"] > 0)
         )
         return True
 
+    def _compute_loss(self, y_ens_fn: str) -> float:
+        """
+        Reads a prediction file of the ensemble data set and returns its
+        loss with respect to the optimization metric
+        """
+        y_ensemble = self._read_np_fn(y_ens_fn, cast=False)
+        losses = calculate_loss(
+            metrics=[self._get_opt_metric()],
+            target=self.y_true_ensemble,
+            prediction=y_ensemble,
+            task_type=self.task_type,
+            **self.metric_kwargs
+        )
+        return losses[self.opt_metric]
+
+    def _get_opt_metric(self) -> autoPyTorchMetric:
+        """
+        Only the optimization metric is needed to rank the models, so
+        there is no need to compute the loss of the other metrics
+        """
+        for metric in self.metrics:
+            if metric.name == self.opt_metric:
+                return metric
+        raise ValueError(f"Cannot optimize for {self.opt_metric} in {self.metrics}")
+
+    def _get_accuracy_labels(self) -> Optional[np.ndarray]:
+        """
+        Returns the labels of the ensemble data set if the optimization metric is
+        the accuracy of a binary or multiclass classification problem, for which
+        the loss of all files in a batch can be computed with a single numpy call.
+        Returns None if the generic calculate_loss has to be used.
+        """
+        return get_accuracy_labels(self._get_opt_metric(), self.task_type, self.y_true_ensemble)
+
+    def _predict_labels(self, y_ens_fn: str, n_samples: int) -> Optional[np.ndarray]:
+        """
+        Reads a prediction file of the ensemble data set and returns the predicted
+        class of every sample, or None if the file does not hold class probabilities
+        """
+        y_ensemble = self._read_np_fn(y_ens_fn, cast=False)
+        if y_ensemble.ndim != 2 or y_ensemble.shape[0] != n_samples or y_ensemble.shape[1] < 2:
+            return None
+        return np.argmax(y_ensemble, axis=1)
+
+    def _compute_losses(self, y_ens_files: List[str]) -> Iterator[Tuple[str, Future]]:
+        """
+        Computes the loss of the given prediction files.
+
+        For the accuracy of a classification problem, the predicted classes of all
+        files are collected in one preallocated array and compared against the
+        labels at once, which gives exactly the loss of calculate_loss without
+        the per file validation of sklearn. Other metrics, as well as files whose
+        shape does not fit, go through calculate_loss one file at a time.
+
+        Parameters
+        ----------
+        y_ens_files: List[str]
+            the prediction files to score
+
+        Returns
+        -------
+        Iterator[Tuple[str, Future]]
+            the file and a finished future holding its loss
+        """
+        labels = self._get_accuracy_labels()
+        if labels is None:
+            yield from self._map_prediction_files(self._compute_loss, y_ens_files)
+            return
+
+        n_samples = labels.shape[0]
+        predicted = np.empty((len(y_ens_files), n_samples), dtype=np.intp)
+        batched: List[str] = []
+        for y_ens_fn, future in self._map_prediction_files(
+            lambda y_ens_fn: self._predict_labels(y_ens_fn, n_samples), y_ens_files
+        ):
+            if future.exception() is not None:
+                yield y_ens_fn, future
+            elif future.result() is None:
+                yield y_ens_fn, self._call_inline(self._compute_loss, y_ens_fn)
+            else:
+                predicted[len(batched)] = future.result()
+                batched.append(y_ens_fn)
+
+        losses = 1.0 - np.mean(predicted[:len(batched)] == labels, axis=1)
+        for y_ens_fn, loss in zip(batched, losses.tolist()):
+            future = Future()
+            future.set_result(loss)
+            yield y_ens_fn, future
+
+    def _map_prediction_files(
+        self, func: Callable[[str], Any], y_ens_files: List[str]
+    ) -> Iterator[Tuple[str, Future]]:
+        """
+        Applies func to every given prediction file.
+
+        Reading a file is bound by I/O and numpy releases the GIL for most of
+        the metric computations, so a thread pool overlaps both. The ensemble
+        builder runs in a process forked by pynisher, which is why threads are
+        used rather than dask tasks. Under a memory limit, pynisher restricts the
+        address space of that process and starting a thread can fail or even
+        hang, so the files are processed one after another in that case.
+
+        Parameters
+        ----------
+        func: Callable[[str], Any]
+            the function to apply to a prediction file
+        y_ens_files: List[str]
+            the prediction files to process
+
+        Returns
+        -------
+        Iterator[Tuple[str, Future]]
+            the file and a finished future holding the result of func, in
+            the order in which the calls finish
+        """
+        executor = self._get_thread_pool(len(y_ens_files))
+        if executor is None:
+            for y_ens_fn in y_ens_files:
+                yield y_ens_fn, self._call_inline(func, y_ens_fn)
+            return
+
+        with executor:
+            futures = {
+                executor.submit(func, y_ens_fn): y_ens_fn
+                for y_ens_fn in y_ens_files
+            }
+            for future in as_completed(futures):
+                yield futures[future], future
+
+    def _get_thread_pool(self, n_tasks: int) -> Optional[ThreadPoolExecutor]:
+        """
+        Returns a thread pool for the given number of tasks, or None if they
+        should rather run in the calling thread
+
+        Parameters
+        ----------
+        n_tasks: int
+            the number of tasks that are going to be submitted
+
+        Returns
+        -------
+        Optional[ThreadPoolExecutor]
+            a pool of at most MAX_THREADS threads, or None if there is at
+            most one task, a memory limit or not all threads could be started
+        """
+        if n_tasks <= 1 or self.memory_limit is not None:
+            return None
+        return self._start_thread_pool(min(n_tasks, MAX_THREADS, os.cpu_count() or 1))
+
+    @staticmethod
+    def _start_thread_pool(n_workers: int) -> Optional[ThreadPoolExecutor]:
+        """
+        Creates a thread pool and starts all of its threads up front. A pool
+        only starts a thread when a task is submitted, and if that fails, the
+        task is queued nonetheless. With every thread running, submitting a
+        task cannot fail anymore, so no task can end up being run twice or
+        never.
+
+        Parameters
+        ----------
+        n_workers: int
+            the number of threads of the pool
+
+        Returns
+        -------
+        Optional[ThreadPoolExecutor]
+            the pool, or None if not all of its threads could be started
+        """
+        executor = ThreadPoolExecutor(max_workers=n_workers)
+        # Each thread blocks until all of them are started, so that none of them
+        # is idle and every submit starts a new one
+        barrier = threading.Barrier(n_workers + 1)
+        try:
+            for _ in range(n_workers):
+                executor.submit(barrier.wait)
+            barrier.wait()
+        except (RuntimeError, threading.BrokenBarrierError):
+            barrier.abort()
+            executor.shutdown(wait=False)
+            return None
+        return executor
+
+    @staticmethod
+    def _call_inline(func: Callable[[str], Any], y_ens_fn: str) -> Future:
+        """
+        Applies func to a prediction file in the calling thread and wraps
+        the outcome in a finished future
+        """
+        future: Future = Future()
+        try:
+            future.set_result(func(y_ens_fn))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
     def get_n_best_preds(self) -> List[str]:
         """
             get best n predictions (i.e., keys of self.read_losses)
@@ -1039,24 +1429,24 @@ class EnsembleBuilder(object):
                   if max models in disc is exceeded.
         """
 
-        sorted_keys = self._get_list_of_sorted_preds()
+        # Only the models which end up being selected have to be sorted by loss,
+        # which is done once their number is known
+        keys = [(k, v["ens_loss"], v["num_run"]) for k, v in self.read_losses.items()]
 
         # number of models available
-        num_keys = len(sorted_keys)
+        num_keys = len(keys)
         # remove all that are at most as good as random
         # note: dummy model must have run_id=1 (there is no run_id=0)
-        dummy_losses = list(filter(lambda x: x[2] == 1, sorted_keys))
+        dummy_losses = list(filter(lambda x: x[2] == 1, keys))
         # Leave this here for when we enable dummy classifier/scorer
         if len(dummy_losses) > 0:
             # number of dummy models
             num_dummy = len(dummy_losses)
-            dummy_loss = dummy_losses[0]
+            dummy_loss = self._sort_preds(dummy_losses, 1)[0]
             self.logger.debug("Use %f as dummy loss" % dummy_loss[1])
-            sorted_keys = list(filter(lambda x: x[1] < dummy_loss[1], sorted_keys))
-
-            # remove Dummy Classifier
-            sorted_keys = list(filter(lambda x: x[2] > 1, sorted_keys))
-            if len(sorted_keys) == 0:
+            # keep the models better than random and remove Dummy Classifier
+            keys = [x for x in keys if x[1] < dummy_loss[1] and x[2] > 1]
+            if len(keys) == 0:
                 # no model left; try to use dummy loss (num_run==0)
                 # log warning when there are other models but not better than dummy model
                 if num_keys > num_dummy:
@@ -1065,7 +1455,7 @@ class EnsembleBuilder(object):
                                         "Number of dummy models: %d",
                                         num_keys - 1,
                                         num_dummy)
-                sorted_keys = [
+                keys = [
                     (k, v["ens_loss"], v["num_run"]) for k, v in self.read_losses.items()
                     if v["seed"] == self.seed and v["num_run"] == 1
                 ]
@@ -1073,42 +1463,43 @@ class EnsembleBuilder(object):
         # considered to be in the top models again!
         if not isinstance(self.ensemble_nbest, numbers.Integral):
             # Transform to number of models to keep. Keep at least one
-            keep_nbest = max(1, min(len(sorted_keys),
-                                    int(len(sorted_keys) * self.ensemble_nbest)))
+            keep_nbest = max(1, min(len(keys),
+                                    int(len(keys) * self.ensemble_nbest)))
             self.logger.debug(
                 "Library pruning: using only top %f percent of the models for ensemble "
                 "(%d out of %d)",
-                self.ensemble_nbest * 100, keep_nbest, len(sorted_keys)
+                self.ensemble_nbest * 100, keep_nbest, len(keys)
             )
         else:
             # Keep only at most ensemble_nbest
-            keep_nbest = min(self.ensemble_nbest, len(sorted_keys))
+            keep_nbest = min(self.ensemble_nbest, len(keys))
             self.logger.debug("Library Pruning: using for ensemble only "
-                              " %d (out of %d) models" % (keep_nbest, len(sorted_keys)))
+                              " %d (out of %d) models" % (keep_nbest, len(keys)))
 
         # If max_models_on_disc is None, do nothing
         # One can only read at most max_models_on_disc models
         if self.max_models_on_disc is not None:
             if not isinstance(self.max_models_on_disc, numbers.Integral):
-                consumption = [
-                    [
-                        v["ens_loss"],
-                        v["disc_space_cost_mb"],
-                    ] for v in self.read_losses.values() if v["disc_space_cost_mb"] is not None
-                ]
-                max_consumption = max(c[1] for c in consumption)
+                # The loss and the disc space of every model, one model per row
+                consumption = np.array([
+                    (v["ens_loss"], v["disc_space_cost_mb"])
+                    for v in self.read_losses.values() if v["disc_space_cost_mb"] is not None
+                ], dtype=np.float64)
+                max_consumption = consumption[:, 1].max()
+                total_consumption = consumption[:, 1].sum() + max_consumption
 
                 # We are pessimistic with the consumption limit indicated by
                 # max_models_on_disc by 1 model. Such model is assumed to spend
                 # max_consumption megabytes
-                if (sum(c[1] for c in consumption) + max_consumption) > self.max_models_on_disc:
+                if total_consumption > self.max_models_on_disc:
 
                     # just leave the best -- smaller is better!
-                    # This list is in descending order, to preserve the best models
-                    sorted_cum_consumption = np.cumsum([
-                        c[1] for c in list(sorted(consumption))
-                    ]) + max_consumption
-                    max_models = np.argmax(sorted_cum_consumption > self.max_models_on_disc)
+                    # The models are ordered by loss, then by disc space, to preserve the best models
+                    order = np.lexsort((consumption[:, 1], consumption[:, 0]))
+                    sorted_cum_consumption = np.cumsum(consumption[order, 1]) + max_consumption
+                    max_models = int(np.searchsorted(
+                        sorted_cum_consumption, self.max_models_on_disc, side='right'
+                    ))
 
                     # Make sure that at least 1 model survives
                     self.max_resident_models = max(1, max_models)
@@ -1116,7 +1507,7 @@ class EnsembleBuilder(object):
                         "Limiting num of models via float max_models_on_disc={}"
                         " as accumulated={} worst={} num_models={}".format(
                             self.max_models_on_disc,
-                            (sum(c[1] for c in consumption) + max_consumption),
+                            total_consumption,
                             max_consumption,
                             self.max_resident_models
                         )
@@ -1134,6 +1525,25 @@ class EnsembleBuilder(object):
             )
             keep_nbest = self.max_resident_models
 
+        # The predictions of all selected models are held in memory at once. Rather
+        # than running out of memory and restarting with half of ensemble_nbest,
+        # only select as many models as fit into half of the memory limit
+        # The predictions of all models on the ensemble data set have the same shape,
+        # the ones of the best model are used as it is loaded in any case
+        if len(keys) > 0:
+            max_models_in_memory = self._get_max_models_in_memory(self._sort_preds(keys, 1)[0][0])
+            if max_models_in_memory is not None and keep_nbest > max_models_in_memory:
+                self.logger.info(
+                    "Restricting the number of models to {} instead of {} to keep their "
+                    "predictions within half of the memory limit of {} MB".format(
+                        max_models_in_memory, keep_nbest, self.memory_limit,
+                    )
+                )
+                keep_nbest = max_models_in_memory
+
+        # Sort the best models, at least one, which is all the rest of this method needs
+        sorted_keys = self._sort_preds(keys, max(1, keep_nbest))
+
         # consider performance_range_threshold
         if self.performance_range_threshold > 0:
             best_loss = sorted_keys[0][1]
@@ -1155,10 +1565,11 @@ class EnsembleBuilder(object):
         ensemble_n_best = keep_nbest
 
         # reduce to keys
-        reduced_sorted_keys = list(map(lambda x: x[0], sorted_keys))
+        reduced_sorted_keys = list(map(lambda x: x[0], sorted_keys[:ensemble_n_best]))
 
         # remove loaded predictions for non-winning models
-        for k in reduced_sorted_keys[ensemble_n_best:]:
+        winners = set(reduced_sorted_keys)
+        for k in [x[0] for x in keys if x[0] not in winners]:
             if k in self.read_preds:
                 self.read_preds[k][Y_ENSEMBLE] = None
                 self.read_preds[k][Y_TEST] = None
@@ -1173,20 +1584,138 @@ class EnsembleBuilder(object):
                 self.read_losses[k]['loaded'] = 2
 
         # Load the predictions for the winning
-        for k in reduced_sorted_keys[:ensemble_n_best]:
+        to_load = [
+            k for k in reduced_sorted_keys
             if (
                 (
                     k not in self.read_preds or self.read_preds[k][Y_ENSEMBLE] is None
                 )
                 and self.read_losses[k]['loaded'] != 3
-            ):
-                self.read_preds[k][Y_ENSEMBLE] = self._read_np_fn(k)
-                # No need to load test here because they are loaded
-                #  only if the model ends up in the ensemble
-                self.read_losses[k]['loaded'] = 1
+            )
+        ]
+        for k, future in self._map_prediction_files(self._read_np_fn, to_load):
+            self.read_preds[k][Y_ENSEMBLE] = future.result()
+            # No need to load test here because they are loaded
+            #  only if the model ends up in the ensemble
+            self.read_losses[k]['loaded'] = 1
 
         # return best scored keys of self.read_losses
-        return reduced_sorted_keys[:ensemble_n_best]
+        return reduced_sorted_keys
+
+    def _get_max_models_in_memory(self, pred_path: str) -> Optional[int]:
+        """
+        Estimates how many models can have their ensemble and test predictions
+        loaded at the same time without exceeding half of the memory limit.
+
+        Parameters
+        ----------
+        pred_path: str
+            a prediction file on the ensemble data set, whose shape is
+            representative for every model
+
+        Returns
+        -------
+        Optional[int]
+            the number of models, at least one, or None if there is no
+            memory limit or the shape of the predictions could not be read
+        """
+        if self.memory_limit is None:
+            return None
+        try:
+            shape, dtype = self._read_npy_header(pred_path)
+        except Exception as e:
+            self.logger.warning(
+                "Could not read the shape of the predictions in %s, the number of models "
+                "is not limited by the memory limit: %s", pred_path, e
+            )
+            return None
+        itemsize = {16: 2, 32: 4, 64: 8}.get(self.precision, dtype.itemsize)
+        # The ensemble and the test predictions of a model have about the same size
+        model_bytes = 2 * int(np.prod(shape)) * itemsize
+        if model_bytes == 0:
+            return None
+        budget_bytes = self.memory_limit * 0.5 * 1024 * 1024
+        return max(1, int(budget_bytes // model_bytes))
+
+    def _read_npy_header(self, path: str) -> Tuple[Tuple[int, ...], np.dtype]:
+        """
+        Reads the shape and dtype of the array in a .npy or .npy.gz file from its
+        header, without reading the data.
+
+        Parameters
+        ----------
+        path: str
+            location of the .npy or .npy.gz file
+
+        Returns
+        -------
+        Tuple[Tuple[int, ...], np.dtype]
+            the shape and dtype of the array
+        """
+        if path.endswith("gz"):
+            open_gz = igzip.open if isal_installed else gzip.open
+            with open_gz(path, 'rb') as fp:
+                shape, _, dtype = self._read_npy_stream_header(fp)
+            return shape, dtype
+        header = self._npy_header_cache.get(path)
+        if header is not None:
+            return header[0], header[1]
+        with open(path, 'rb') as fp:
+            shape, _, dtype = self._read_npy_stream_header(fp)
+        return shape, dtype
+
+    @staticmethod
+    def _read_npy_stream_header(fp: IO[bytes]) -> Tuple[Tuple[int, ...], bool, np.dtype]:
+        """
+        Reads the header of an array in the .npy format from a stream.
+
+        Parameters
+        ----------
+        fp: IO[bytes]
+            the stream, positioned at the start of the .npy data
+
+        Returns
+        -------
+        Tuple[Tuple[int, ...], bool, np.dtype]
+            the shape, whether the array is in Fortran order, and the dtype
+        """
+        version = np.lib.format.read_magic(fp)
+        if version == (1, 0):
+            return np.lib.format.read_array_header_1_0(fp)  # type: ignore[no-any-return]
+        elif version == (2, 0):
+            return np.lib.format.read_array_header_2_0(fp)  # type: ignore[no-any-return]
+        raise ValueError("Unsupported .npy format version %s" % (version,))
+
+    @staticmethod
+    def _stat_test_pred(pred_path: str) -> Optional[Tuple[str, float]]:
+        """
+        Finds the test predictions of the model whose predictions on the
+        ensemble data set are stored in pred_path. Both are stored in the
+        directory of the run and only differ in their prefix, so the two
+        candidate names are stat'ed instead of listing the directory.
+
+        Parameters
+        ----------
+        pred_path: str
+            path to the predictions of a model on the ensemble data set
+
+        Returns
+        -------
+        Optional[Tuple[str, float]]
+            the path of the test predictions and their modification time, or
+            None if the model has no test predictions
+        """
+        run_dir, name = os.path.split(pred_path)
+        if name.endswith('.gz'):
+            name = name[:-3]
+        identifier = name[len('predictions_ensemble_'):-len('.npy')]
+        for extension in ('.npy', '.npy.gz'):
+            test_fn = os.path.join(run_dir, 'predictions_test_%s%s' % (identifier, extension))
+            try:
+                return test_fn, os.stat(test_fn).st_mtime
+            except FileNotFoundError:
+                continue
+        return None
 
     def get_test_preds(self, selected_keys: List[str]) -> List[str]:
         """
@@ -1202,49 +1731,39 @@ class EnsembleBuilder(object):
             all keys in selected keys for which we could read the valid and
             test predictions
         """
-        success_keys_test = []
+        success_keys_test: Set[str] = set()
+        to_read: Dict[str, Tuple[str, float]] = {}
 
         for k in selected_keys:
-            test_fn = glob.glob(
-                os.path.join(
-                    glob.escape(self.backend.get_runs_directory()),
-                    '%d_%d_%s' % (
-                        self.read_losses[k]["seed"],
-                        self.read_losses[k]["num_run"],
-                        self.read_losses[k]["budget"],
-                    ),
-                    'predictions_test_%d_%d_%s.npy*' % (
-                        self.read_losses[k]["seed"],
-                        self.read_losses[k]["num_run"],
-                        self.read_losses[k]["budget"]
-                    )
-                )
-            )
-            test_fn = [tfn for tfn in test_fn if tfn.endswith('.npy') or tfn.endswith('.npy.gz')]
-
-            if len(test_fn) == 0:
+            test = self._stat_test_pred(k)
+            if test is None:
                 # self.logger.debug("Not found test prediction file (although "
                 #                   "ensemble predictions available):%s" %
-                #                   test_fn)
+                #                   k)
                 pass
             else:
+                test_fn, mtime_test = test
                 if (
-                    self.read_losses[k]["mtime_test"] == os.path.getmtime(test_fn[0])
+                    self.read_losses[k]["mtime_test"] == mtime_test
                     and k in self.read_preds
                     and self.read_preds[k][Y_TEST] is not None
                 ):
-                    success_keys_test.append(k)
+                    success_keys_test.add(k)
                     continue
-                try:
-                    y_test = self._read_np_fn(test_fn[0])
-                    self.read_preds[k][Y_TEST] = y_test
-                    success_keys_test.append(k)
-                    self.read_losses[k]["mtime_test"] = os.path.getmtime(test_fn[0])
-                except Exception:
-                    self.logger.warning('Error loading %s: %s',
-                                        test_fn, traceback.format_exc())
+                to_read[test_fn] = (k, mtime_test)
+
+        # The files are read in parallel where threads can be used
+        for test_fn, future in self._map_prediction_files(self._read_np_fn, list(to_read)):
+            k, mtime_test = to_read[test_fn]
+            try:
+                self.read_preds[k][Y_TEST] = future.result()
+                success_keys_test.add(k)
+                self.read_losses[k]["mtime_test"] = mtime_test
+            except Exception:
+                self.logger.warning('Error loading %s: %s',
+                                    test_fn, traceback.format_exc())
 
-        return success_keys_test
+        return [k for k in selected_keys if k in success_keys_test]
 
     def fit_ensemble(self, selected_keys: List[str]) -> Optional[EnsembleSelection]:
         """
@@ -1273,11 +1792,23 @@ class EnsembleBuilder(object):
             )
             for k in selected_keys]
 
-        # check hash if ensemble training data changed
-        current_hash = "".join([
-            str(zlib.adler32(predictions_train[i].data.tobytes()))
-            for i in range(len(predictions_train))
-        ])
+        # check hash if ensemble training data changed. The predictions of a model
+        # are only read again if the modification time of their file changed, so
+        # the selected models and these times identify the training data.
+        # Hidden feature which can be activated via an environment variable: hash
+        # the predictions themselves, to validate the above. The checksum is
+        # rolled over the buffers of the predictions, which are not copied for it
+        if os.environ.get('ENSEMBLE_HASH_PREDICTIONS'):
+            current_hash = 1
+            for prediction in predictions_train:
+                current_hash = zlib.adler32(
+                    memoryview(np.ascontiguousarray(prediction)).cast('B'), current_hash
+                )
+        else:
+            current_hash = hash(tuple(
+                (*include_num_run, self.read_losses[k]["mtime_ens"])
+                for k, include_num_run in zip(selected_keys, include_num_runs)
+            ))
         if self.last_hash == current_hash:
             self.logger.debug(
                 "No new model predictions selected -- skip ensemble building "
@@ -1387,6 +1918,29 @@ class EnsembleBuilder(object):
             )
             return None
 
+    @staticmethod
+    def _to_binary_probabilities(pred: np.ndarray) -> np.ndarray:
+        """
+        Turns the probabilities of the positive class into a (n_samples, 2)
+        array holding the probabilities of both classes, filled in place.
+
+        Parameters
+        ----------
+        pred: np.ndarray
+            the probabilities of the positive class, of shape (n_samples,)
+            or (n_samples, 1)
+
+        Returns
+        -------
+        np.ndarray
+            the probabilities of the negative and the positive class
+        """
+        pred = pred.reshape(-1)
+        probabilities = np.empty((pred.shape[0], 2), dtype=pred.dtype)
+        np.subtract(1, pred, out=probabilities[:, 0])
+        probabilities[:, 1] = pred
+        return probabilities
+
     def _add_ensemble_trajectory(self, train_pred: np.ndarray, test_pred: np.ndarray) -> None:
         """
         Records a snapshot of how the performance look at a given training
@@ -1398,18 +1952,16 @@ class EnsembleBuilder(object):
         test_pred: np.ndarray
             The predictions on the test set using ensemble
         """
+        import pandas as pd
+
         performance_stamp = {
             'Timestamp': pd.Timestamp.now(),
         }
         if self.output_type == BINARY:
             if len(train_pred.shape) == 1 or train_pred.shape[1] == 1:
-                train_pred = np.vstack(
-                    ((1 - train_pred).reshape((1, -1)), train_pred.reshape((1, -1)))
-                ).transpose()
+                train_pred = self._to_binary_probabilities(train_pred)
             if test_pred is not None and (len(test_pred.shape) == 1 or test_pred.shape[1] == 1):
-                test_pred = np.vstack(
-                    ((1 - test_pred).reshape((1, -1)), test_pred.reshape((1, -1)))
-                ).transpose()
+                test_pred = self._to_binary_probabilities(test_pred)
 
         train_scores = calculate_score(
             metrics=self.metrics,
@@ -1432,7 +1984,41 @@ class EnsembleBuilder(object):
 
         self.ensemble_history.append(performance_stamp)
 
-    def _get_list_of_sorted_preds(self) -> List[Tuple[str, float, int]]:
+    def _drop_non_members(self, ensemble: AbstractEnsemble, selected_keys: List[str]) -> bool:
+        """
+        Releases the predictions of the selected models which did not end up
+        in the ensemble, so that they are neither kept in memory nor stored
+        for the next iteration. They are read again if they are selected again.
+
+        Parameters
+        ----------
+        ensemble: AbstractEnsemble
+            the ensemble fitted on the selected models
+        selected_keys: List[str]
+            the keys of self.read_losses the ensemble was fitted on
+
+        Returns
+        -------
+        bool
+            whether the predictions of any model were released
+        """
+        members = set(ensemble.get_selected_model_identifiers())
+        dropped = False
+        for k in selected_keys:
+            identifier = (
+                self.read_losses[k]["seed"],
+                self.read_losses[k]["num_run"],
+                self.read_losses[k]["budget"],
+            )
+            if identifier in members or self.read_losses[k]["loaded"] != 1:
+                continue
+            self.read_preds[k][Y_ENSEMBLE] = None
+            self.read_preds[k][Y_TEST] = None
+            self.read_losses[k]["loaded"] = 2
+            dropped = True
+        return dropped
+
+    def _get_list_of_sorted_preds(self, n: Optional[int] = None) -> List[Tuple[str, float, int]]:
         """
             Returns a list of sorted predictions in descending performance order.
             (We are solving a minimization problem)
@@ -1440,7 +2026,8 @@ class EnsembleBuilder(object):
 
             Parameters
             ----------
-            None
+            n: Optional[int]
+                how many of the best predictions to return, all if None
 
             Return
             ------
@@ -1449,17 +2036,39 @@ class EnsembleBuilder(object):
                 we will sort s.t. l[0] <= l[1] <= ... <= l[N] and for any pairs of
                 i, j (i < j, l[i] = l[j]), the resulting sequence satisfies n[i] <= n[j]
         """
+        return self._sort_preds([
+            (k, v["ens_loss"], v["num_run"])
+            for k, v in self.read_losses.items()
+        ], n)
+
+    @staticmethod
+    def _sort_preds(
+        preds: List[Tuple[str, float, int]], n: Optional[int] = None
+    ) -> List[Tuple[str, float, int]]:
+        """
+            Sorts (key, loss, num_run) triples like _get_list_of_sorted_preds.
+            If only the first n of them are requested, they are found with a
+            partial heap sort in O(N log n) instead of sorting all of them.
+
+            Parameters
+            ----------
+            preds: List[Tuple[str, float, int]]
+                the triples to sort
+            n: Optional[int]
+                how many of the best triples to return, all if None
+
+            Return
+            ------
+            sorted_keys:
+                the (first n) triples in ascending order of loss, then num_run
+        """
+        # Sort by loss as priority 1 and then by num_run on a ascending order
+        # We want small num_run first
+        key = operator.itemgetter(1, 2)
+        if n is not None and n < len(preds):
+            return heapq.nsmallest(n, preds, key=key)
         # Sort by loss - smaller is better!
-        sorted_keys = list(sorted(
-            [
-                (k, v["ens_loss"], v["num_run"])
-                for k, v in self.read_losses.items()
-            ],
-            # Sort by loss as priority 1 and then by num_run on a ascending order
-            # We want small num_run first
-            key=lambda x: (x[1], x[2]),
-        ))
-        return sorted_keys
+        return sorted(preds, key=key)
 
     def _delete_excess_models(self, selected_keys: List[str]) -> None:
         """
@@ -1473,18 +2082,20 @@ class EnsembleBuilder(object):
         if self.max_resident_models is None:
             return
 
-        # Obtain a list of sorted pred keys
-        pre_sorted_keys = self._get_list_of_sorted_preds()
-        sorted_keys = list(map(lambda x: x[0], pre_sorted_keys))
-
-        if len(sorted_keys) <= self.max_resident_models:
+        if len(self.read_losses) <= self.max_resident_models:
             # Don't waste time if not enough models to delete
             return
 
         # The top self.max_resident_models models would be the candidates
         # Any other low performance model will be deleted
-        # The list is in ascending order of score
-        candidates = sorted_keys[:self.max_resident_models]
+        # The order of the other models does not matter, so only the
+        # candidates are sorted
+        candidates = frozenset(
+            k for k, _, _ in self._get_list_of_sorted_preds(self.max_resident_models)
+        )
+
+        # Removals that are done already need not be waited for anymore
+        self._pending_deletions = [f for f in self._pending_deletions if not f.done()]
 
         # Loop through the files currently in the directory
         for pred_path in self.y_ens_files:
@@ -1496,13 +2107,20 @@ class EnsembleBuilder(object):
             if pred_path in self._has_been_candidate:
                 continue
 
-            match = self.model_fn_re.search(pred_path)
-            if match is None:
+            # The identifier was parsed when the file was first read
+            losses = self.read_losses.get(pred_path)
+            identifier: Optional[Tuple[int, int, float]]
+            if losses is not None:
+                # Do not delete the dummy prediction, nor models that are deleted already
+                if losses["num_run"] == 1 or losses["loaded"] == 3:
+                    continue
+                identifier = losses["seed"], losses["num_run"], losses["budget"]
+            else:
+                identifier = self._parse_model_fn(pred_path)
+            if identifier is None:
                 raise ValueError("Could not interpret file {pred_path} "
                                  "Something went wrong while reading predictions")
-            _seed = int(match.group(1))
-            _num_run = int(match.group(2))
-            _budget = float(match.group(3))
+            _seed, _num_run, _budget = identifier
 
             # Do not delete the dummy prediction
             if _num_run == 1:
@@ -1510,9 +2128,15 @@ class EnsembleBuilder(object):
 
             numrun_dir = self.backend.get_numrun_directory(_seed, _num_run, _budget)
             try:
+                # Once renamed, the model is gone for everyone else, so only
+                # the removal of its files can be left to the background
                 os.rename(numrun_dir, numrun_dir + '.old')
-                shutil.rmtree(numrun_dir + '.old')
-                self.logger.info("Deleted files of non-candidate model %s", pred_path)
+                if self._delete_pool is not None:
+                    self._pending_deletions.append(
+                        self._delete_pool.submit(self._remove_model_dir, numrun_dir + '.old', pred_path)
+                    )
+                else:
+                    self._remove_model_dir(numrun_dir + '.old', pred_path)
                 self.read_losses[pred_path]["disc_space_cost_mb"] = None
                 self.read_losses[pred_path]["loaded"] = 3
                 self.read_losses[pred_path]["ens_loss"] = np.inf
@@ -1522,22 +2146,505 @@ class EnsembleBuilder(object):
                     " to error %s", pred_path, e
                 )
 
-    def _read_np_fn(self, path: str) -> np.ndarray:
-        precision = self.precision
+    def _remove_model_dir(self, path: str, pred_path: str) -> None:
+        """
+            Removes the renamed directory of a deleted model.
+
+            Parameters
+            ----------
+            path: str
+                the directory to remove
+            pred_path: str
+                the prediction file of the model, for logging
+        """
+        try:
+            shutil.rmtree(path)
+            self.logger.info("Deleted files of non-candidate model {}".format(pred_path))
+        except Exception as e:
+            self.logger.error(
+                "Failed to delete files of non-candidate model %s due"
+                " to error %s", pred_path, e
+            )
+
+    def _wait_for_deletions(self) -> None:
+        """
+            Waits until the directories of the models deleted by
+            _delete_excess_models are removed from disc.
+        """
+        if self._pending_deletions:
+            wait(self._pending_deletions)
+            self._pending_deletions = []
+
+    def _save_read_preds(self, path: str) -> None:
+        """
+        Stores self.read_preds and self.last_hash in a directory. Every
+        prediction array is kept in its own .npy file, named after the run it
+        belongs to, and an index.json maps the prediction files to them, next
+        to the last hash.
+
+        Arrays that are mapped from their file in this directory are stored
+        already, so only the arrays read in this iteration are written. Files
+        are replaced instead of overwritten, as the previous arrays might still
+        be mapped into memory.
+
+        Parameters
+        ----------
+        path: str
+            The directory to write
+        """
+        os.makedirs(path, exist_ok=True)
+
+        index = {}
+        stored = {'index.json'}
+        for pred_fn, preds in self.read_preds.items():
+            names: List[Optional[str]] = []
+            for key in (Y_ENSEMBLE, Y_TEST):
+                pred = preds[key]
+                if pred is None:
+                    names.append(None)
+                    continue
+                name = '%s_%d.npy' % (os.path.basename(os.path.dirname(pred_fn)), key)
+                file_path = os.path.join(path, name)
+                if not (
+                    isinstance(pred.base, np.memmap)
+                    and pred.base.filename == os.path.abspath(file_path)
+                ):
+                    with open(file_path + '.tmp', 'wb') as fp:
+                        np.save(fp, pred)
+                    os.replace(file_path + '.tmp', file_path)
+                names.append(name)
+                stored.add(name)
+            index[pred_fn] = names
+
+        with open(os.path.join(path, 'index.json.tmp'), 'w') as fp:
+            json.dump({'last_hash': self.last_hash, 'read_preds': index}, fp)
+        os.replace(os.path.join(path, 'index.json.tmp'), os.path.join(path, 'index.json'))
+
+        # Remove the arrays of predictions that are no longer kept
+        for name in os.listdir(path):
+            if name not in stored:
+                os.remove(os.path.join(path, name))
+
+    @staticmethod
+    def _load_read_preds(path: str) -> Tuple[Dict[str, Dict[int, Optional[np.ndarray]]], Optional[int]]:
+        """
+        Restores the read predictions written by _save_read_preds. The arrays
+        are memory mapped, so only the predictions that are used are read.
+
+        Parameters
+        ----------
+        path: str
+            The directory to read
+
+        Returns
+        -------
+        read_preds: Dict[str, Dict[int, Optional[np.ndarray]]]
+            The read predictions, in the same format as self.read_preds
+        last_hash: Optional[int]
+            The hash of the last ensemble training data
+        """
+        with open(os.path.join(path, 'index.json')) as fp:
+            index = json.load(fp)
+
+        read_preds = {}
+        for pred_fn, names in index['read_preds'].items():
+            read_preds[pred_fn] = {
+                key: None if name is None else np.asarray(
+                    np.load(os.path.join(path, name), mmap_mode='c', allow_pickle=False)
+                )
+                for key, name in zip((Y_ENSEMBLE, Y_TEST), names)
+            }
+        return read_preds, index['last_hash']
+
+    def _save_read_losses(self) -> None:
+        """
+        Stores self.read_losses. Only the entries that changed since the losses
+        were loaded or last stored are written, as one line of JSON appended to
+        a journal, so the cost of an iteration does not grow with the number of
+        models. If there is no snapshot yet, the journal holds
+        MAX_LOSSES_JOURNAL_LENGTH lines, or the stored losses could not be read
+        completely, all losses are written to a new .npz snapshot instead and
+        the journal is removed.
+
+        Every snapshot gets a new id, which each line of the journal refers to.
+        If the builder is killed between replacing the snapshot and removing
+        the journal, the lines left behind are thus not replayed over the newer
+        snapshot.
+        """
+        changed = {
+            k: v for k, v in self.read_losses.items() if self._stored_losses.get(k) != v
+        }
+        if (
+            not os.path.exists(self.ensemble_loss_file)
+            or self._journal_length >= MAX_LOSSES_JOURNAL_LENGTH
+        ):
+            self._snapshot_id = uuid.uuid4().hex
+            self._save_losses_npz(self.ensemble_loss_file, self._snapshot_id)
+            if os.path.exists(self.ensemble_loss_journal):
+                os.remove(self.ensemble_loss_journal)
+            self._journal_length = 0
+        elif len(changed) > 0:
+            with open(self.ensemble_loss_journal, 'a') as fp:
+                # numpy scalars are stored as the python scalars they hold
+                fp.write(json.dumps(
+                    {"snapshot": self._snapshot_id, "changes": changed},
+                    default=lambda o: o.item(),
+                ) + '\n')
+            self._journal_length += 1
+
+        for k, v in changed.items():
+            self._stored_losses[k] = dict(v)
+
+    @classmethod
+    def _load_read_losses(
+        cls, path: str, journal_path: str
+    ) -> Tuple[Dict[str, Dict[str, Any]], int, str]:
+        """
+        Restores the read losses written by _save_read_losses, that is, the
+        snapshot with the changes of the journal applied in order. Lines of the
+        journal that belong to an older snapshot are skipped. The replay stops
+        at a line that was not completely written, as a later line may have
+        been appended to it. In both cases, the returned journal length is
+        MAX_LOSSES_JOURNAL_LENGTH, so that the next save writes a new snapshot.
+
+        Parameters
+        ----------
+        path: str
+            The .npz snapshot to read
+        journal_path: str
+            The journal of the changes since the snapshot
+
+        Returns
+        -------
+        read_losses: Dict[str, Dict[str, Any]]
+            The read losses, in the same format as self.read_losses
+        journal_length: int
+            The number of changes read from the journal
+        snapshot_id: str
+            The id of the snapshot
+        """
+        read_losses, snapshot_id = cls._load_losses_npz(path)
+        journal_length = 0
+        compact = False
+        if os.path.exists(journal_path):
+            with open(journal_path) as fp:
+                for line in fp:
+                    try:
+                        entry = json.loads(line)
+                        line_snapshot_id, changed = entry["snapshot"], entry["changes"]
+                    except (ValueError, TypeError, KeyError):
+                        # The change was not completely written
+                        compact = True
+                        break
+                    if line_snapshot_id != snapshot_id:
+                        compact = True
+                        continue
+                    read_losses.update(changed)
+                    journal_length += 1
+        if compact:
+            journal_length = MAX_LOSSES_JOURNAL_LENGTH
+        return read_losses, journal_length, snapshot_id
+
+    def _save_losses_npz(self, path: str, snapshot_id: str) -> None:
+        """
+        Stores self.read_losses in a structure of arrays layout, that is,
+        one numpy array per field of the read losses entries, all of them
+        indexed by the position of the prediction file in the filename array.
+        The file is written next to its destination and then moved there, so
+        an interrupted write never leaves a truncated file behind.
+
+        Parameters
+        ----------
+        path: str
+            Where to write the .npz file
+        snapshot_id: str
+            The id of the snapshot, stored along with the losses
+        """
+        filenames = list(self.read_losses.keys())
+        entries = list(self.read_losses.values())
+        columns = {
+            'filename': np.array(filenames, dtype=str),
+            'ens_loss': np.array([v["ens_loss"] for v in entries], dtype=np.float64),
+            'mtime_ens': np.array([v["mtime_ens"] for v in entries], dtype=np.float64),
+            'mtime_test': np.array([v["mtime_test"] for v in entries], dtype=np.float64),
+            'seed': np.array([v["seed"] for v in entries], dtype=np.int64),
+            'num_run': np.array([v["num_run"] for v in entries], dtype=np.int64),
+            'budget': np.array([v["budget"] for v in entries], dtype=np.float64),
+            # None (disc space not computed yet) is encoded as NaN
+            'disc_space_cost_mb': np.array(
+                [np.nan if v["disc_space_cost_mb"] is None else v["disc_space_cost_mb"]
+                 for v in entries],
+                dtype=np.float64,
+            ),
+            'loaded': np.array([v["loaded"] for v in entries], dtype=np.int8),
+            'snapshot_id': np.array(snapshot_id, dtype=str),
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, "wb") as memory:
+            np.savez(memory, **columns)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _load_losses_npz(path: str) -> Tuple[Dict[str, Dict[str, Any]], str]:
+        """
+        Restores the read losses written by _save_losses_npz.
+
+        Parameters
+        ----------
+        path: str
+            The .npz file to read
+
+        Returns
+        -------
+        read_losses: Dict[str, Dict[str, Any]]
+            The read losses, in the same format as self.read_losses
+        snapshot_id: str
+            The id of the snapshot
+        """
+        with np.load(path, allow_pickle=False) as columns:
+            snapshot_id = str(columns['snapshot_id'])
+            # tolist() converts a whole column to python scalars at once
+            filenames = columns['filename'].tolist()
+            fields = [
+                columns[field].tolist() for field in (
+                    'ens_loss', 'mtime_ens', 'mtime_test', 'seed',
+                    'num_run', 'budget', 'disc_space_cost_mb', 'loaded',
+                )
+            ]
+
+        read_losses = {}
+        for filename, ens_loss, mtime_ens, mtime_test, seed, num_run, budget, disc_space_cost_mb, \
+                loaded in zip(filenames, *fields):
+            read_losses[filename] = {
+                "ens_loss": ens_loss,
+                "mtime_ens": mtime_ens,
+                "mtime_test": mtime_test,
+                "seed": seed,
+                "num_run": num_run,
+                "budget": budget,
+                "disc_space_cost_mb": None if math.isnan(disc_space_cost_mb) else disc_space_cost_mb,
+                "loaded": loaded,
+            }
+        return read_losses, snapshot_id
+
+    def _read_npy_gz(self, path: str, dtype: Optional[np.dtype] = None, keep: bool = False) -> np.ndarray:
+        """
+        Decompresses a .npy.gz file, with isal if it is installed. The predictions
+        of a model that was just scored are read again once the model is selected,
+        so those decoded for scoring are kept in a small LRU cache keyed by the path
+        and the modification time of the file. The cache holds at most
+        max_resident_models arrays (64 if unlimited) and, under a memory limit,
+        at most a quarter of it. An entry is handed out to the next read of the
+        file and leaves the cache, so predictions loaded into self.read_preds
+        are not held twice. The read that keeps the predictions gets a copy, as
+        some metrics sanitize the predictions in place.
+
+        Parameters
+        ----------
+        path: str
+            location of the .npy.gz file
+        dtype: Optional[np.dtype]
+            the dtype of the returned predictions, the stored one if None
+        keep: bool
+            whether to keep the decoded predictions for the next read of the file
+
+        Returns
+        -------
+        np.ndarray
+            the predictions
+        """
+        key = (path, os.stat(path).st_mtime_ns)
+        with self._gz_cache_lock:
+            predictions = self._gz_cache.pop(key, None)
+            if predictions is not None:
+                self._gz_cache_nbytes -= predictions.nbytes
+        if predictions is None:
+            predictions = self._decode_npy_gz(path)
+            if keep:
+                max_entries = self.max_resident_models or 64
+                max_nbytes = None if self.memory_limit is None else self.memory_limit * 1024 ** 2 / 4
+                with self._gz_cache_lock:
+                    if key not in self._gz_cache:
+                        self._gz_cache[key] = predictions
+                        self._gz_cache_nbytes += predictions.nbytes
+                    while len(self._gz_cache) > 0 and (
+                        len(self._gz_cache) > max_entries
+                        or (max_nbytes is not None and self._gz_cache_nbytes > max_nbytes)
+                    ):
+                        _, evicted = self._gz_cache.popitem(last=False)
+                        self._gz_cache_nbytes -= evicted.nbytes
+                return predictions.astype(predictions.dtype if dtype is None else dtype)
+        return predictions if dtype is None else predictions.astype(dtype, copy=False)
+
+    def _decode_npy_gz(self, path: str) -> np.ndarray:
+        """
+        Decompresses a .npy.gz file, with isal if it is installed
+        """
+        open_gz = igzip.open if isal_installed else gzip.open
+        with open_gz(path, 'rb') as fp:
+            return self._read_npy_stream(fp)
+
+    @staticmethod
+    def _read_npy_stream(fp: IO[bytes]) -> np.ndarray:
+        """
+        Reads an array in the .npy format from a stream. np.load reads the data
+        into intermediate byte strings, which are then copied into the array.
+        Here the array is allocated from the header and the data is read into
+        it directly.
+
+        Parameters
+        ----------
+        fp: IO[bytes]
+            the stream, positioned at the start of the .npy data
+
+        Returns
+        -------
+        np.ndarray
+            the array
+        """
+        try:
+            shape, fortran_order, dtype = EnsembleBuilder._read_npy_stream_header(fp)
+        except ValueError:
+            dtype = None
+        if dtype is None or dtype.hasobject:
+            # Other versions and object arrays are left to numpy
+            fp.seek(0)
+            return np.load(fp, allow_pickle=True)
+
+        array = np.empty(shape, dtype=dtype, order='F' if fortran_order else 'C')
+        if array.size == 0:
+            return array
+        # The transpose of a Fortran ordered array is C contiguous
+        buffer = memoryview(array.T if fortran_order else array).cast('B')
+        position = 0
+        while position < len(buffer):
+            n_read = fp.readinto(buffer[position:])  # type: ignore[attr-defined]
+            if not n_read:
+                raise ValueError("Failed to read all data for array of shape %s, the file "
+                                 "seems not fully written" % (shape,))
+            position += n_read
+        return array
+
+    def _read_np_fn(self, path: str, cast: bool = True) -> np.ndarray:
+        """
+        Reads a prediction file.
+
+        Parameters
+        ----------
+        path: str
+            location of the .npy or .npy.gz file
+        cast: bool
+            whether to convert the predictions to self.precision. Computing
+            a loss does not need a converted copy, so the loss scan reads
+            the predictions as they are stored.
+
+        Returns
+        -------
+        np.ndarray
+            the predictions
+        """
+        dtype = None
+        if cast and self.precision in (16, 32, 64):
+            dtype = np.dtype('float%d' % self.precision)
 
         if path.endswith("gz"):
-            fp = gzip.open(path, 'rb')
+            # The predictions decoded for scoring a model that is not loaded yet
+            # are kept for loading it
+            keep = not cast and self.read_preds.get(path, {}).get(Y_ENSEMBLE) is None
+            predictions = self._read_npy_gz(path, dtype, keep)
         elif path.endswith("npy"):
-            fp = open(path, 'rb')
+            predictions = self._memmap_npy(path)
         else:
             raise ValueError("Unknown filetype %s" % path)
-        if precision == 16:
-            predictions = np.load(fp, allow_pickle=True).astype(dtype=np.float16)
-        elif precision == 32:
-            predictions = np.load(fp, allow_pickle=True).astype(dtype=np.float32)
-        elif precision == 64:
-            predictions = np.load(fp, allow_pickle=True).astype(dtype=np.float64)
-        else:
-            predictions = np.load(fp, allow_pickle=True)
-        fp.close()
+        if dtype is not None:
+            predictions = predictions.astype(dtype=dtype, copy=False)
         return predictions
+
+    def _load_y_test(self, path: str) -> Optional[np.ndarray]:
+        """
+        Loads the targets of the test split. They are copied to a .npy file the
+        first time, so that the following builders map this file instead of
+        unpickling the whole datamanager, and builders running on the same node
+        share its pages.
+
+        Parameters
+        ----------
+        path: str
+            location of the cached targets
+
+        Returns
+        -------
+        Optional[np.ndarray]
+            the test targets, or None if the dataset has no test split
+        """
+        if os.path.exists(path):
+            return self._memmap_npy(path)
+
+        datamanager = self.backend.load_datamanager()
+        if datamanager.test_tensors is None:
+            return None
+        y_test = np.asarray(datamanager.test_tensors[1])
+        del datamanager
+
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as fh:
+                np.save(fh, y_test, allow_pickle=False)
+            os.replace(tmp_path, path)
+        except (OSError, ValueError):
+            # Object arrays cannot be stored without pickling, they are
+            # read from the datamanager every time instead
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return y_test
+
+    def _memmap_npy(self, path: str) -> np.ndarray:
+        """
+        Maps a .npy file into memory instead of reading it, so only the pages
+        touched by the caller are paged in. The mapping is copy-on-write, as
+        some metrics sanitize the predictions in place; such writes never reach
+        the file. The parsed header is cached per filename so a repeated read
+        skips the magic/header parsing.
+
+        Parameters
+        ----------
+        path: str
+            location of the .npy file
+
+        Returns
+        -------
+        np.ndarray
+            a copy-on-write view on the mapped file
+        """
+        header = self._npy_header_cache.get(path)
+        if header is not None:
+            shape, dtype, fortran_order, offset = header
+            try:
+                return np.asarray(np.memmap(path, dtype=dtype, mode='c', offset=offset,
+                                            shape=shape, order='F' if fortran_order else 'C'))
+            except ValueError:
+                # The file was rewritten with a different layout
+                del self._npy_header_cache[path]
+            except OSError as e:
+                if e.errno != errno.ENOMEM:
+                    raise
+                return np.load(path, allow_pickle=True)
+        try:
+            mapped = np.load(path, mmap_mode='c', allow_pickle=False)
+        except ValueError:
+            # Object arrays cannot be mapped, read them eagerly
+            return np.load(path, allow_pickle=True)
+        except OSError as e:
+            # Under the address space limit set by pynisher a mapping fails with
+            # ENOMEM instead of a MemoryError. Read eagerly so that a real lack
+            # of memory is reported as a MemoryError and the caller can back off.
+            if e.errno != errno.ENOMEM:
+                raise
+            return np.load(path, allow_pickle=True)
+        if isinstance(mapped, np.memmap):
+            self._npy_header_cache[path] = (
+                mapped.shape, mapped.dtype,
+                mapped.flags.f_contiguous and not mapped.flags.c_contiguous,
+                mapped.offset,
+            )
+        return np.asarray(mapped)
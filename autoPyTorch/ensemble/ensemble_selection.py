@@ -6,7 +6,7 @@ import numpy as np
 from autoPyTorch.ensemble.abstract_ensemble import AbstractEnsemble
 from autoPyTorch.pipeline.base_pipeline import BasePipeline
 from autoPyTorch.pipeline.components.training.metrics.base import autoPyTorchMetric
-from autoPyTorch.pipeline.components.training.metrics.utils import calculate_loss
+from autoPyTorch.pipeline.components.training.metrics.utils import calculate_loss, get_accuracy_labels
 
 
 class EnsembleSelection(AbstractEnsemble):
@@ -95,6 +95,16 @@ class EnsembleSelection(AbstractEnsemble):
 
         ensemble_size = self.ensemble_size
 
+        # For the accuracy of class probabilities, the loss of a candidate
+        # only depends on the argmax of the averaged prediction, which is
+        # much cheaper than going through the generic calculate_loss
+        accuracy_labels = get_accuracy_labels(self.metric, self.task_type, labels)
+        if (
+            accuracy_labels is not None
+            and (predictions[0].ndim != 2 or predictions[0].shape[1] < 2)
+        ):
+            accuracy_labels = None
+
         weighted_ensemble_prediction = np.zeros(
             predictions[0].shape,
             dtype=np.float64,
@@ -133,6 +143,12 @@ class EnsembleSelection(AbstractEnsemble):
                     out=fant_ensemble_prediction
                 )
 
+                if accuracy_labels is not None:
+                    losses[j] = 1.0 - np.mean(
+                        np.argmax(fant_ensemble_prediction, axis=1) == accuracy_labels
+                    )
+                    continue
+
                 # Calculate loss is versatile and can return a dict of slosses
                 losses[j] = calculate_loss(
                     metrics=[self.metric],
@@ -184,36 +200,43 @@ class EnsembleSelection(AbstractEnsemble):
         found during training.
 
         Args:
-            predictions (List[np.ndarray]):
-                A list of predictions from the individual base models.
+            predictions (Union[np.ndarray, List[np.ndarray]]):
+                A list of predictions from the individual base models, or
+                these predictions stacked along the first axis.
 
         Returns:
             average (np.ndarray): Soft voting predictions of ensemble models, using
                                 the weights found during ensemble selection (self._weights)
         """
 
-        average = np.zeros_like(predictions[0], dtype=np.float64)
-        tmp_predictions = np.empty_like(predictions[0], dtype=np.float64)
+        weights = np.asarray(self.weights_, dtype=np.float64)
 
         # if predictions.shape[0] == len(self.weights_),
         # predictions include those of zero-weight models.
-        if len(predictions) == len(self.weights_):
-            for pred, weight in zip(predictions, self.weights_):
-                np.multiply(pred, weight, out=tmp_predictions)
-                np.add(average, tmp_predictions, out=average)
-
-        # if prediction model.shape[0] == len(non_null_weights),
-        # predictions do not include those of zero-weight models.
-        elif len(predictions) == np.count_nonzero(self.weights_):
-            non_null_weights = [w for w in self.weights_ if w > 0]
-            for pred, weight in zip(predictions, non_null_weights):
-                np.multiply(pred, weight, out=tmp_predictions)
-                np.add(average, tmp_predictions, out=average)
-
-        # If none of the above applies, then something must have gone wrong.
-        else:
-            raise ValueError("The dimensions of ensemble predictions"
-                             " and ensemble weights do not match!")
+        if len(predictions) != len(weights):
+            # if prediction model.shape[0] == len(non_null_weights),
+            # predictions do not include those of zero-weight models.
+            if len(predictions) == np.count_nonzero(weights):
+                weights = weights[weights > 0]
+
+            # If none of the above applies, then something must have gone wrong.
+            else:
+                raise ValueError("The dimensions of ensemble predictions"
+                                 " and ensemble weights do not match!")
+
+        # Predictions stacked in a single array are averaged with one call
+        if isinstance(predictions, np.ndarray):
+            return np.tensordot(weights, predictions, axes=(0, 0))
+
+        average = np.zeros_like(predictions[0], dtype=np.float64)
+        tmp_predictions = np.empty_like(predictions[0], dtype=np.float64)
+        for pred, weight in zip(predictions, weights):
+            # The predictions of zero-weight models are not touched, so
+            # they are never paged in when they are memory mapped
+            if weight == 0:
+                continue
+            np.multiply(pred, weight, out=tmp_predictions)
+            np.add(average, tmp_predictions, out=average)
         del tmp_predictions
         return average
 
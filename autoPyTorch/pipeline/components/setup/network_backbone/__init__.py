@@ -1,6 +1,7 @@
+import functools
 import os
 from collections import OrderedDict
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Type
 
 import ConfigSpace.hyperparameters as CSH
 from ConfigSpace.configuration_space import ConfigurationSpace
@@ -21,12 +22,37 @@ _backbones = find_components(__package__,
                              directory,
                              NetworkBackboneComponent)
 _addons = ThirdPartyComponents(NetworkBackboneComponent)
+# The merged components, along with the addons they were built from
+_components_cache: Optional[Tuple[Tuple[Tuple[str, Type[autoPyTorchComponent]], ...],
+                                  Dict[str, autoPyTorchComponent]]] = None
 
 
 def add_backbone(backbone: NetworkBackboneComponent) -> None:
     _addons.add_component(backbone)
 
 
+@functools.lru_cache(maxsize=None)
+def _handles_task_type(entry: Type[autoPyTorchComponent], task_type: str) -> bool:
+    """Returns whether a backbone can handle the given task type. The properties
+    of a component are fixed, so the answer is computed once per task type
+
+    Args:
+        entry (Type[autoPyTorchComponent]): the backbone component
+        task_type (str): the task type of the dataset
+
+    Returns:
+        bool: whether the backbone is compatible with the task type
+    """
+    properties = entry.get_properties()
+    if 'tabular' in task_type and not bool(properties['handles_tabular']):
+        return False
+    elif 'image' in task_type and not bool(properties['handles_image']):
+        return False
+    elif 'time_series' in task_type and not bool(properties['handles_time_series']):
+        return False
+    return True
+
+
 class NetworkBackboneChoice(autoPyTorchChoice):
 
     def get_components(self) -> Dict[str, autoPyTorchComponent]:
@@ -37,11 +63,20 @@ class NetworkBackboneChoice(autoPyTorchChoice):
 
         Returns:
             Dict[str, autoPyTorchComponent]: all basebackbone components available
-                as choices for learning rate scheduling
+                as choices for learning rate scheduling. The dictionary is shared
+                between calls and must not be modified
         """
+        global _components_cache
+        # Compared by their items, as a backbone added again under the same name
+        # replaces the former one without changing the size of the addons
+        key = tuple(_addons.components.items())
+        if _components_cache is not None and _components_cache[0] == key:
+            return _components_cache[1]
+
         components = OrderedDict()
         components.update(_backbones)
         components.update(_addons.components)
+        _components_cache = (key, components)
         return components
 
     def get_available_components(
@@ -94,13 +129,7 @@ class NetworkBackboneChoice(autoPyTorchChoice):
             if entry == NetworkBackboneChoice or hasattr(entry, 'get_components'):
                 continue
 
-            task_type = str(dataset_properties['task_type'])
-            properties = entry.get_properties()
-            if 'tabular' in task_type and not bool(properties['handles_tabular']):
-                continue
-            elif 'image' in task_type and not bool(properties['handles_image']):
-                continue
-            elif 'time_series' in task_type and not bool(properties['handles_time_series']):
+            if not _handles_task_type(entry, str(dataset_properties['task_type'])):
                 continue
 
             # target_type = dataset_properties['target_type']
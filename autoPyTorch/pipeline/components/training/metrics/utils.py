@@ -3,6 +3,9 @@ from typing import Any, Dict, Iterable, List, Optional
 
 import numpy as np
 
+import sklearn.metrics
+from sklearn.utils.multiclass import type_of_target
+
 from autoPyTorch.constants import (
     CLASSIFICATION_TASKS,
     FORECASTING_TASKS,
@@ -11,7 +14,7 @@ from autoPyTorch.constants import (
     STRING_TO_TASK_TYPES,
     TASK_TYPES,
 )
-from autoPyTorch.pipeline.components.training.metrics.base import autoPyTorchMetric
+from autoPyTorch.pipeline.components.training.metrics.base import _PredictMetric, autoPyTorchMetric
 from autoPyTorch.pipeline.components.training.metrics.metrics import (
     CLASSIFICATION_METRICS,
     FORECASTING_METRICS,
@@ -227,3 +230,36 @@ def calculate_loss(
             continue
         loss_dict[metric_.name] = metric_._optimum - metric_._sign * score[metric_.name]
     return loss_dict
+
+
+def get_accuracy_labels(
+    metric: autoPyTorchMetric,
+    task_type: int,
+    target: Optional[np.ndarray],
+) -> Optional[np.ndarray]:
+    """
+    Returns the target as a 1-D array if the metric is the plain accuracy of a
+    binary or multiclass classification problem, in which case the loss of a
+    probability prediction is one minus the fraction of matching argmax labels.
+    Returns None if calculate_loss has to be used instead.
+
+    Args:
+        metric (autoPyTorchMetric): the metric to evaluate
+        task_type (int): the task type of the problem
+        target (Optional[np.ndarray]): the ground truth
+
+    Returns:
+        Optional[np.ndarray]: the labels, or None
+    """
+    if (
+        target is None
+        or task_type not in CLASSIFICATION_TASKS
+        or not isinstance(metric, _PredictMetric)
+        or metric.get_metric_func() is not sklearn.metrics.accuracy_score
+        or metric._kwargs
+    ):
+        return None
+    labels = np.asarray(target)
+    if labels.ndim != 1 or type_of_target(labels) not in ('binary', 'multiclass'):
+        return None
+    return labels
@@ -1,4 +1,4 @@
-from typing import Any, Generator, Union, Mapping, Optional
+from typing import Any, Callable, Dict, Generator, Union, Mapping, Optional
 
 from ConfigSpace.configuration_space import Configuration, ConfigurationSpace
 from ConfigSpace.types import f64, Array
@@ -6,6 +6,61 @@ import numpy as np
 import smac.configspace
 import smac.optimizer.acquisition.maximizer
 
+_NP_INT_TYPES = (
+    np.int_,
+    np.intc,
+    np.intp,
+    np.int8,
+    np.int16,
+    np.int32,
+    np.int64,
+    np.uint8,
+    np.uint16,
+    np.uint32,
+    np.uint64,
+)
+_NP_FLOAT_TYPES = (np.float16, np.float32, np.float64)
+_NP_COMPLEX_TYPES = (np.complex64, np.complex128)
+
+
+def _convert_complex(obj: Any) -> Any:
+    return {"real": obj.real, "imag": obj.imag}
+
+
+def _convert_list(obj: Any) -> Any:
+    return [convert_np_types(_o) for _o in obj]
+
+
+def _convert_dict(obj: Any) -> Any:
+    return {k: convert_np_types(v) for k, v in obj.items()}
+
+
+def _convert_ndarray(obj: Any) -> Any:
+    # tolist already returns Python scalars, except for the elements of object arrays
+    if obj.dtype == object:
+        return [convert_np_types(_o) for _o in obj.tolist()]
+    return obj.tolist()
+
+
+def _convert_void(obj: Any) -> Any:
+    return None
+
+
+# Converters looked up by the exact type of an object, which saves going
+# through the isinstance checks below for the common types
+_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    **{t: int for t in _NP_INT_TYPES},
+    **{t: float for t in _NP_FLOAT_TYPES},
+    **{t: _convert_complex for t in _NP_COMPLEX_TYPES},
+    np.str_: str,
+    np.ndarray: _convert_ndarray,
+    np.bool_: bool,
+    np.void: _convert_void,
+    list: _convert_list,
+    dict: _convert_dict,
+}
+
+
 def convert_np_types(obj: Any) -> Any:
     """
     Converts NumPy object to JSON-friendly types.
@@ -18,35 +73,30 @@ def convert_np_types(obj: Any) -> Any:
         Any:
             Converted object
     """
-    if isinstance(
-        obj,
-        (
-            np.int_,
-            np.intc,
-            np.intp,
-            np.int8,
-            np.int16,
-            np.int32,
-            np.int64,
-            np.uint8,
-            np.uint16,
-            np.uint32,
-            np.uint64,
-        ),
-    ):
+    # Most configuration values are plain Python objects, which stay as they are
+    obj_type = type(obj)
+    if obj_type is int or obj_type is float or obj_type is str or obj_type is bool or obj is None:
+        return obj
+
+    converter = _CONVERTERS.get(obj_type)
+    if converter is not None:
+        return converter(obj)
+
+    # Subclasses of the types above
+    if isinstance(obj, _NP_INT_TYPES):
         return int(obj)
 
-    elif isinstance(obj, (np.float16, np.float32, np.float64)):
+    elif isinstance(obj, _NP_FLOAT_TYPES):
         return float(obj)
 
-    elif isinstance(obj, (np.complex64, np.complex128)):
-        return {"real": obj.real, "imag": obj.imag}
+    elif isinstance(obj, _NP_COMPLEX_TYPES):
+        return _convert_complex(obj)
 
     elif isinstance(obj, (np.str_)):
         return str(obj)
 
     elif isinstance(obj, (np.ndarray,)):
-        return obj.tolist()
+        return _convert_ndarray(obj)
 
     elif isinstance(obj, (np.bool_)):
         return bool(obj)
@@ -55,10 +105,10 @@ def convert_np_types(obj: Any) -> Any:
         return None
 
     elif isinstance(obj, list):
-        return [convert_np_types(_o) for _o in obj]
+        return _convert_list(obj)
 
     elif isinstance(obj, dict):
-        return {k: convert_np_types(v) for k, v in obj.items()}
+        return _convert_dict(obj)
 
     return obj
 
@@ -99,6 +149,10 @@ class CustomConfiguration(Configuration):
 
     @classmethod
     def cast(cls, x: Configuration) -> "CustomConfiguration":
+        # Configurations that are cast already, or created as CustomConfiguration,
+        # have the additional variables set
+        if type(x) is CustomConfiguration:
+            return x
         # Set additional variables for backward compatibility
         x.configuration_space = x.config_space
         x.__class__ = CustomConfiguration
@@ -124,15 +178,10 @@ class CustomConfigurationSpace(ConfigurationSpace):
     def sample_configuration(self, size=None) -> Union[Configuration, list[Configuration]]:
         configs = super().sample_configuration(size=size)
 
-        is_list = True
+        cast = CustomConfiguration.cast
         if not isinstance(configs, list):
-            is_list = False
-            configs = [configs]
-
-        for i, conf in enumerate(configs):
-            configs[i] = CustomConfiguration.cast(conf)
-
-        return configs if is_list else configs[0]
+            return cast(configs)
+        return [cast(conf) for conf in configs]
 
     def get_default_configuration(self):
         config = super().get_default_configuration()
@@ -149,6 +198,8 @@ def get_one_exchange_neighbourhood(
     """
     Creates neighbours of the given configuration
     and casts them to CustomConfiguration.
+    Neighbours are only created as they are consumed,
+    so a caller that stops early does not pay for the rest.
 
     Args:
         configuration (CustomConfiguration):
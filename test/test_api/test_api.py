@@ -145,10 +145,10 @@ def test_tabular_classification(openml_id, resampling_strategy, backend, resampl
         'smac3-output/run_42/train_insts.txt',
         'smac3-output/run_42/trajectory.json',
         '.autoPyTorch/datamanager.pkl',
-        '.autoPyTorch/ensemble_read_preds.pkl',
+        '.autoPyTorch/ensemble_read_preds',
         '.autoPyTorch/start_time_42',
         '.autoPyTorch/ensemble_history.json',
-        '.autoPyTorch/ensemble_read_losses.pkl',
+        '.autoPyTorch/ensemble_read_losses.npz',
         '.autoPyTorch/true_targets_ensemble.npy',
     ]
     for expected_file in expected_files:
@@ -340,10 +340,10 @@ def test_tabular_regression(openml_name, resampling_strategy, backend, resamplin
         'smac3-output/run_42/train_insts.txt',
         'smac3-output/run_42/trajectory.json',
         '.autoPyTorch/datamanager.pkl',
-        '.autoPyTorch/ensemble_read_preds.pkl',
+        '.autoPyTorch/ensemble_read_preds',
         '.autoPyTorch/start_time_42',
         '.autoPyTorch/ensemble_history.json',
-        '.autoPyTorch/ensemble_read_losses.pkl',
+        '.autoPyTorch/ensemble_read_losses.npz',
         '.autoPyTorch/true_targets_ensemble.npy',
     ]
     for expected_file in expected_files:
@@ -547,10 +547,10 @@ def test_time_series_forecasting(forecasting_toy_dataset, resampling_strategy, b
         'smac3-output/run_42/train_insts.txt',
         'smac3-output/run_42/trajectory.json',
         '.autoPyTorch/datamanager.pkl',
-        '.autoPyTorch/ensemble_read_preds.pkl',
+        '.autoPyTorch/ensemble_read_preds',
         '.autoPyTorch/start_time_42',
         '.autoPyTorch/ensemble_history.json',
-        '.autoPyTorch/ensemble_read_losses.pkl',
+        '.autoPyTorch/ensemble_read_losses.npz',
         '.autoPyTorch/true_targets_ensemble.npy',
     ]
     for expected_file in expected_files:
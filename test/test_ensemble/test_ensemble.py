@@ -1,9 +1,10 @@
+import gzip
 import os
-import pickle
 import shutil
 import sys
 import time
 import unittest.mock
+from concurrent.futures import ThreadPoolExecutor
 
 import dask.distributed
 
@@ -21,12 +22,14 @@ from autoPyTorch.constants import BINARY, MULTICLASS, TABULAR_CLASSIFICATION
 from autoPyTorch.ensemble.ensemble_builder import (
     EnsembleBuilder,
     EnsembleBuilderManager,
+    MAX_LOSSES_JOURNAL_LENGTH,
     Y_ENSEMBLE,
     Y_TEST,
 )
 from autoPyTorch.ensemble.ensemble_selection import EnsembleSelection
 from autoPyTorch.ensemble.singlebest_ensemble import SingleBest
 from autoPyTorch.pipeline.components.training.metrics.metrics import accuracy
+from autoPyTorch.pipeline.components.training.metrics.utils import calculate_loss, get_accuracy_labels
 
 this_directory = os.path.dirname(__file__)
 sys.path.append(this_directory)
@@ -151,6 +154,227 @@ def testRead(ensemble_backend):
     )
 
 
+def testReadUnchangedFilesAreNotRescored(ensemble_backend):
+
+    ensbuilder = EnsembleBuilder(
+        backend=ensemble_backend,
+        dataset_name="TEST",
+        output_type=BINARY,
+        task_type=TABULAR_CLASSIFICATION,
+        metrics=[accuracy],
+        opt_metric='accuracy',
+        seed=0,  # important to find the test files
+    )
+
+    assert ensbuilder.compute_loss_per_model()
+    read_losses = {k: dict(v) for k, v in ensbuilder.read_losses.items()}
+
+    # Nothing changed on disk, so no prediction has to be read again,
+    # and only the runs directory itself has to be listed
+    with unittest.mock.patch.object(ensbuilder, '_read_np_fn') as read_np_fn, \
+            unittest.mock.patch('os.scandir', wraps=os.scandir) as scandir:
+        assert ensbuilder.compute_loss_per_model()
+        assert read_np_fn.call_count == 0
+        assert scandir.call_count == 1
+    assert read_losses == ensbuilder.read_losses
+    assert len(ensbuilder.read_preds) == 3
+
+
+def testReadConcurrently(ensemble_backend):
+
+    kwargs = dict(
+        backend=ensemble_backend,
+        dataset_name="TEST",
+        output_type=BINARY,
+        task_type=TABULAR_CLASSIFICATION,
+        metrics=[accuracy],
+        opt_metric='accuracy',
+        seed=0,  # important to find the test files
+    )
+    serial = EnsembleBuilder(memory_limit=1024, **kwargs)
+    assert serial.compute_loss_per_model()
+
+    # Without a memory limit the files are scored by a thread pool
+    concurrent = EnsembleBuilder(memory_limit=None, **kwargs)
+    assert concurrent.compute_loss_per_model()
+    assert concurrent.read_losses == serial.read_losses
+
+    # Only read_at_most files are scored per call
+    limited = EnsembleBuilder(memory_limit=None, read_at_most=2, **kwargs)
+    assert limited.compute_loss_per_model()
+    assert sum(v["loaded"] == 2 for v in limited.read_losses.values()) == 2
+
+    # If not all threads of a pool can be started, no pool is used
+    # and the files are scored in the calling thread
+    submit = ThreadPoolExecutor.submit
+    calls = []
+
+    def fail_after_first(executor, *args, **kwargs):
+        calls.append(args)
+        if len(calls) > 1:
+            raise RuntimeError("can't start new thread")
+        return submit(executor, *args, **kwargs)
+
+    with unittest.mock.patch.object(ThreadPoolExecutor, 'submit', fail_after_first):
+        assert EnsembleBuilder._start_thread_pool(2) is None
+        fallback = EnsembleBuilder(memory_limit=None, **kwargs)
+        assert fallback._delete_pool is None
+        assert fallback.compute_loss_per_model()
+    assert fallback.read_losses == serial.read_losses
+
+
+def testReadBatchedAccuracy(ensemble_backend):
+
+    kwargs = dict(
+        backend=ensemble_backend,
+        dataset_name="TEST",
+        output_type=BINARY,
+        task_type=TABULAR_CLASSIFICATION,
+        metrics=[accuracy],
+        opt_metric='accuracy',
+        seed=0,  # important to find the test files
+    )
+    # The stored targets are one-hot encoded, the batched path needs class labels
+    y_true = np.argmax(ensemble_backend.load_targets_ensemble(), axis=1)
+
+    batched = EnsembleBuilder(**kwargs)
+    batched.y_true_ensemble = y_true
+    assert batched._get_accuracy_labels() is not None
+    assert batched.compute_loss_per_model()
+
+    # The batched accuracy has to match the loss of calculate_loss
+    generic = EnsembleBuilder(**kwargs)
+    generic.y_true_ensemble = y_true
+    with unittest.mock.patch.object(generic, '_get_accuracy_labels', return_value=None):
+        assert generic.compute_loss_per_model()
+    assert batched.read_losses == generic.read_losses
+
+
+def testReadNpyIsMemoryMapped(ensemble_backend):
+
+    ensbuilder = EnsembleBuilder(
+        backend=ensemble_backend,
+        dataset_name="TEST",
+        output_type=BINARY,
+        task_type=TABULAR_CLASSIFICATION,
+        metrics=[accuracy],
+        opt_metric='accuracy',
+        seed=0,  # important to find the test files
+        precision=None,
+    )
+
+    path = os.path.join(
+        ensemble_backend.temporary_directory,
+        ".autoPyTorch/runs/0_1_0.0/predictions_ensemble_0_1_0.0.npy"
+    )
+    expected = np.load(path)
+    first = ensbuilder._read_np_fn(path)
+    assert path in ensbuilder._npy_header_cache
+    assert isinstance(first.base, np.memmap)
+    # The second read is served from the cached header
+    second = ensbuilder._read_np_fn(path)
+    np.testing.assert_array_equal(first, expected)
+    np.testing.assert_array_equal(second, expected)
+
+    # Metrics may sanitize predictions in place, which must not modify the file
+    first[:] = -1
+    np.testing.assert_array_equal(np.load(path), expected)
+
+    # The loss scan reads the predictions as stored, without the precision cast
+    ensbuilder.precision = 16
+    assert ensbuilder._read_np_fn(path).dtype == np.float16
+    assert ensbuilder._read_np_fn(path, cast=False).dtype == expected.dtype
+
+
+def testReadNpyGzIsCached(ensemble_backend):
+
+    ensbuilder = EnsembleBuilder(
+        backend=ensemble_backend,
+        dataset_name="TEST",
+        output_type=BINARY,
+        task_type=TABULAR_CLASSIFICATION,
+        metrics=[accuracy],
+        opt_metric='accuracy',
+        seed=0,  # important to find the test files
+        precision=None,
+    )
+
+    path = os.path.join(
+        ensemble_backend.temporary_directory,
+        ".autoPyTorch/runs/0_1_0.0/predictions_ensemble_0_1_0.0.npy"
+    )
+    expected = np.load(path)
+    with gzip.open(path + '.gz', 'wb') as fp:
+        np.save(fp, expected)
+
+    with unittest.mock.patch('gzip.open', wraps=gzip.open) as gzip_open:
+        # Scoring a model that is not loaded yet keeps the decoded predictions
+        scored = ensbuilder._read_np_fn(path + '.gz', cast=False)
+        # Modifying the returned array does not modify the kept one
+        scored[:] = -1
+        # Loading the model takes the kept predictions out of the cache
+        loaded = ensbuilder._read_np_fn(path + '.gz')
+        assert gzip_open.call_count == 1
+    np.testing.assert_array_equal(loaded, expected)
+    assert len(ensbuilder._gz_cache) == 0
+    assert ensbuilder._gz_cache_nbytes == 0
+
+    # The predictions of a loaded model are not kept
+    ensbuilder.read_preds[path + '.gz'] = {Y_ENSEMBLE: loaded, Y_TEST: None}
+    np.testing.assert_array_equal(ensbuilder._read_np_fn(path + '.gz', cast=False), expected)
+    assert len(ensbuilder._gz_cache) == 0
+    del ensbuilder.read_preds[path + '.gz']
+
+    # A modified file is decoded again
+    ensbuilder._read_np_fn(path + '.gz', cast=False)
+    with gzip.open(path + '.gz', 'wb') as fp:
+        np.save(fp, expected + 1)
+    os.utime(path + '.gz', ns=(0, 0))
+    np.testing.assert_array_equal(ensbuilder._read_np_fn(path + '.gz'), expected + 1)
+
+
+@pytest.mark.parametrize("array", (
+    np.arange(12, dtype=np.float32).reshape((4, 3)),
+    np.asfortranarray(np.arange(12, dtype=np.float64).reshape((4, 3))),
+    np.arange(5, dtype='>f8'),
+    np.empty((0, 2)),
+    np.array([{'a': 1}, None], dtype=object),
+))
+def testReadNpyStream(array, tmp_path):
+    path = str(tmp_path / "array.npy.gz")
+    with gzip.open(path, 'wb') as fp:
+        np.save(fp, array)
+    with gzip.open(path, 'rb') as fp:
+        read = EnsembleBuilder._read_npy_stream(fp)
+    assert read.dtype == array.dtype
+    assert read.flags.f_contiguous == array.flags.f_contiguous
+    np.testing.assert_array_equal(read, array)
+
+    # A truncated file is reported like numpy does
+    with gzip.open(path, 'rb') as fp:
+        data = fp.read()
+    with gzip.open(path, 'wb') as fp:
+        fp.write(data[:-8])
+    if array.size and array.dtype != object:
+        with gzip.open(path, 'rb') as fp, pytest.raises(ValueError):
+            EnsembleBuilder._read_npy_stream(fp)
+
+
+@pytest.mark.parametrize(
+    "pred_path,exp",
+    (
+        ("runs/0_1_0.0/predictions_ensemble_0_1_0.0.npy", (0, 1, 0.0)),
+        ("runs/1_23_100.0/predictions_test_1_23_100.0.npy.gz", (1, 23, 100.0)),
+        ("runs/0_3_100/predictions_ensemble_0_3_100.npy", (0, 3, 100.0)),
+        ("runs/0_1_0.0/predictions_ensemble_0_1_0.0.np", None),
+        ("runs/0_1_0.0/predictions_ensemble_a_1_0.0.npy", None),
+        ("runs/0_1_0.0/1_0.0.npy", None),
+    )
+)
+def testParseModelFn(pred_path, exp):
+    assert EnsembleBuilder._parse_model_fn(pred_path) == exp
+
+
 @pytest.mark.parametrize(
     "ensemble_nbest,max_models_on_disc,exp",
     (
@@ -187,6 +411,90 @@ def testNBest(ensemble_backend, ensemble_nbest, max_models_on_disc, exp):
     assert sel_keys[0] == fixture
 
 
+def testNBestLimitedByMemory(ensemble_backend):
+    ensbuilder = EnsembleBuilder(
+        backend=ensemble_backend,
+        dataset_name="TEST",
+        output_type=BINARY,
+        task_type=TABULAR_CLASSIFICATION,
+        metrics=[accuracy],
+        opt_metric='accuracy',
+        seed=0,  # important to find the test files
+        ensemble_nbest=10,
+        memory_limit=1024,
+    )
+
+    ensbuilder.compute_loss_per_model()
+    assert len(ensbuilder.get_n_best_preds()) == 2
+
+    # Half of this limit only fits the predictions of a single model
+    ensbuilder.memory_limit = 100 / (1024 * 1024)
+    sel_keys = ensbuilder.get_n_best_preds()
+    assert len(sel_keys) == 1
+
+    fixture = os.path.join(
+        ensemble_backend.temporary_directory,
+        ".autoPyTorch/runs/0_2_0.0/predictions_ensemble_0_2_0.0.npy"
+    )
+    assert sel_keys[0] == fixture
+
+
+def testMaxModelsInMemoryReadsHeaderOnly(ensemble_backend):
+    ensbuilder = EnsembleBuilder(
+        backend=ensemble_backend,
+        dataset_name="TEST",
+        output_type=BINARY,
+        task_type=TABULAR_CLASSIFICATION,
+        metrics=[accuracy],
+        opt_metric='accuracy',
+        seed=0,  # important to find the test files
+        memory_limit=1024,
+        precision=None,
+    )
+    path = os.path.join(
+        ensemble_backend.temporary_directory,
+        ".autoPyTorch/runs/0_2_0.0/predictions_ensemble_0_2_0.0.npy"
+    )
+    predictions = np.load(path)
+    with gzip.open(path + '.gz', 'wb') as fp:
+        np.save(fp, predictions)
+
+    expected = max(1, int(1024 * 0.5 * 1024 * 1024 // (2 * predictions.nbytes)))
+    with unittest.mock.patch.object(ensbuilder, '_read_np_fn') as read_np_fn:
+        assert ensbuilder._get_max_models_in_memory(path) == expected
+        assert ensbuilder._get_max_models_in_memory(path + '.gz') == expected
+        assert read_np_fn.call_count == 0
+
+    # Without the shape, the number of models is not limited, which is logged
+    with unittest.mock.patch.object(ensbuilder, '_logger') as logger:
+        assert ensbuilder._get_max_models_in_memory(path + '.missing') is None
+        assert logger.warning.call_count == 1
+
+
+def testYTestIsCached(ensemble_backend):
+    kwargs = dict(
+        backend=ensemble_backend,
+        dataset_name="TEST",
+        output_type=BINARY,
+        task_type=TABULAR_CLASSIFICATION,
+        metrics=[accuracy],
+        opt_metric='accuracy',
+        seed=0,  # important to find the test files
+    )
+    ensbuilder = EnsembleBuilder(**kwargs)
+    expected = ensemble_backend.load_datamanager().test_tensors[1]
+    np.testing.assert_array_equal(ensbuilder.y_test, expected)
+    assert os.path.exists(
+        os.path.join(ensemble_backend.internals_directory, 'ensemble_y_test.npy')
+    )
+
+    # A new builder reads the cached targets instead of the datamanager
+    with unittest.mock.patch.object(ensemble_backend, 'load_datamanager') as load:
+        ensbuilder = EnsembleBuilder(**kwargs)
+    assert load.call_count == 0
+    np.testing.assert_array_equal(ensbuilder.y_test, expected)
+
+
 @pytest.mark.parametrize("test_case,exp", [
     # If None, no reduction
     (None, 2),
@@ -414,8 +722,10 @@ def testGetTestPreds(ensemble_backend):
     assert ensbuilder.read_preds[d2][Y_TEST] is not None
 
 
-def testEntireEnsembleBuilder(ensemble_backend):
+@pytest.mark.parametrize("memory_limit", (1024, None))
+def testEntireEnsembleBuilder(ensemble_backend, memory_limit):
 
+    # Without a memory limit, prediction files are read by a thread pool
     ensbuilder = EnsembleBuilder(
         backend=ensemble_backend,
         dataset_name="TEST",
@@ -425,6 +735,7 @@ def testEntireEnsembleBuilder(ensemble_backend):
         opt_metric='accuracy',
         seed=0,  # important to find the test files
         ensemble_nbest=2,
+        memory_limit=memory_limit,
     )
     ensbuilder.SAVE2DISC = False
 
@@ -459,6 +770,101 @@ def testEntireEnsembleBuilder(ensemble_backend):
     y_test_d2 = ensbuilder.read_preds[d2][Y_TEST][:, 1]
     np.testing.assert_array_almost_equal(y_test, y_test_d2)
 
+    # The same models with unchanged predictions are not fitted again,
+    # until one of their files is modified
+    assert ensbuilder.fit_ensemble(selected_keys=sel_keys) is None
+    ensbuilder.read_losses[d2]["mtime_ens"] += 1
+    assert ensbuilder.fit_ensemble(selected_keys=sel_keys) is not None
+
+
+def testDropNonMembers(ensemble_backend):
+
+    ensbuilder = EnsembleBuilder(
+        backend=ensemble_backend,
+        dataset_name="TEST",
+        output_type=BINARY,
+        task_type=TABULAR_CLASSIFICATION,
+        metrics=[accuracy],
+        opt_metric='accuracy',
+        seed=0,  # important to find the test files
+        ensemble_nbest=2,
+    )
+    ensbuilder.compute_loss_per_model()
+    sel_keys = ensbuilder.get_n_best_preds()
+    assert len(sel_keys) == 2
+    ensemble = ensbuilder.fit_ensemble(selected_keys=sel_keys)
+
+    # Only the first model ends up in the ensemble
+    ensemble.weights_ = np.array([1.0, 0.0])
+    members = set(ensemble.get_selected_model_identifiers())
+    assert len(members) == 1
+
+    assert ensbuilder._drop_non_members(ensemble, sel_keys)
+    for k in sel_keys:
+        v = ensbuilder.read_losses[k]
+        is_member = (v["seed"], v["num_run"], v["budget"]) in members
+        assert (ensbuilder.read_preds[k][Y_ENSEMBLE] is not None) == is_member
+        assert v["loaded"] == (1 if is_member else 2)
+
+
+@pytest.mark.parametrize("memory_limit", (1024, None))
+@unittest.mock.patch('autoPyTorch.ensemble.ensemble_builder.shutil.rmtree')
+@unittest.mock.patch('autoPyTorch.ensemble.ensemble_builder.os.rename')
+def testDeleteExcessModels(rename, rmtree, ensemble_backend, memory_limit):
+
+    ensbuilder = EnsembleBuilder(
+        backend=ensemble_backend,
+        dataset_name="TEST",
+        output_type=BINARY,
+        task_type=TABULAR_CLASSIFICATION,
+        metrics=[accuracy],
+        opt_metric='accuracy',
+        seed=0,  # important to find the test files
+        ensemble_nbest=2,
+        memory_limit=memory_limit,
+    )
+    ensbuilder.max_resident_models = 1
+    # One pool per builder removes the directories of every call
+    delete_pool = ensbuilder._delete_pool
+    assert (delete_pool is None) == (memory_limit is not None)
+    ensbuilder.compute_loss_per_model()
+    assert len(ensbuilder.y_ens_files) == 3
+    best = ensbuilder._get_list_of_sorted_preds(1)[0][0]
+
+    ensbuilder._delete_excess_models(selected_keys=[best])
+    # Without a memory limit, the files are removed in the background
+    ensbuilder._wait_for_deletions()
+    # Neither the best model nor the dummy model are deleted
+    deleted = [k for k, v in ensbuilder.read_losses.items() if v["loaded"] == 3]
+    assert len(deleted) == 1
+    assert best not in deleted
+    assert ensbuilder.read_losses[deleted[0]]["num_run"] != 1
+    assert rmtree.call_count == 1
+
+    # Models that are deleted already are skipped
+    ensbuilder._delete_excess_models(selected_keys=[best])
+    ensbuilder._wait_for_deletions()
+    assert rmtree.call_count == 1
+    assert ensbuilder._delete_pool is delete_pool
+
+
+@pytest.mark.parametrize("shape", ((3,), (3, 1)))
+def testToBinaryProbabilities(shape):
+    pred = np.array([0.1, 0.5, 0.8]).reshape(shape)
+    expected = np.vstack(
+        ((1 - pred).reshape((1, -1)), pred.reshape((1, -1)))
+    ).transpose()
+    np.testing.assert_array_equal(EnsembleBuilder._to_binary_probabilities(pred), expected)
+
+
+def testSortPreds():
+    preds = [("a", 0.5, 3), ("b", 0.1, 4), ("c", 0.5, 2), ("d", 0.3, 5), ("e", 0.1, 1)]
+    expected = [("e", 0.1, 1), ("b", 0.1, 4), ("d", 0.3, 5), ("c", 0.5, 2), ("a", 0.5, 3)]
+    assert EnsembleBuilder._sort_preds(preds) == expected
+    # Partially sorted results are a prefix of the full order
+    for n in range(1, len(preds) + 2):
+        assert EnsembleBuilder._sort_preds(preds, n) == expected[:n]
+
 
 def test_main(ensemble_backend):
 
@@ -501,10 +907,10 @@ def test_main(ensemble_backend):
     assert isinstance(run_history[0]['Timestamp'], pd.Timestamp)
 
     assert os.path.exists(
-        os.path.join(ensemble_backend.internals_directory, 'ensemble_read_preds.pkl')
+        os.path.join(ensemble_backend.internals_directory, 'ensemble_read_preds')
     ), os.listdir(ensemble_backend.internals_directory)
     assert os.path.exists(
-        os.path.join(ensemble_backend.internals_directory, 'ensemble_read_losses.pkl')
+        os.path.join(ensemble_backend.internals_directory, 'ensemble_read_losses.npz')
     ), os.listdir(ensemble_backend.internals_directory)
 
 
@@ -547,11 +953,11 @@ def testLimit(ensemble_backend):
 
     read_losses_file = os.path.join(
         ensemble_backend.internals_directory,
-        'ensemble_read_losses.pkl'
+        'ensemble_read_losses.npz'
     )
     read_preds_file = os.path.join(
         ensemble_backend.internals_directory,
-        'ensemble_read_preds.pkl'
+        'ensemble_read_preds'
     )
 
     with unittest.mock.patch('logging.getLogger') as get_logger_mock, \
@@ -616,26 +1022,26 @@ def test_read_pickle_read_preds(ensemble_backend):
     # Check that the memory was created
     ensemble_memory_file = os.path.join(
         ensemble_backend.internals_directory,
-        'ensemble_read_preds.pkl'
+        'ensemble_read_preds'
     )
     assert os.path.exists(ensemble_memory_file)
 
-    # Make sure we pickle the correct read preads and hash
-    with (open(ensemble_memory_file, "rb")) as memory:
-        read_preds, last_hash = pickle.load(memory)
+    # Make sure we store the correct read preads and hash
+    read_preds, last_hash = EnsembleBuilder._load_read_preds(ensemble_memory_file)
 
     compare_read_preds(read_preds, ensbuilder.read_preds)
     assert last_hash == ensbuilder.last_hash
 
     ensemble_memory_file = os.path.join(
         ensemble_backend.internals_directory,
-        'ensemble_read_losses.pkl'
+        'ensemble_read_losses.npz'
     )
     assert os.path.exists(ensemble_memory_file)
 
-    # Make sure we pickle the correct read scores
-    with (open(ensemble_memory_file, "rb")) as memory:
-        read_losses = pickle.load(memory)
+    # Make sure we store the correct read scores
+    read_losses, _, _ = EnsembleBuilder._load_read_losses(
+        ensemble_memory_file, ensbuilder.ensemble_loss_journal
+    )
 
     compare_read_preds(read_losses, ensbuilder.read_losses)
 
@@ -655,6 +1061,146 @@ def test_read_pickle_read_preds(ensemble_backend):
     compare_read_preds(ensbuilder2.read_losses, ensbuilder.read_losses)
     assert ensbuilder2.last_hash == ensbuilder.last_hash
 
+    # The arrays mapped from the directory are not written again
+    read_preds_file = os.path.join(ensemble_backend.internals_directory, 'ensemble_read_preds')
+    with unittest.mock.patch('numpy.save') as save:
+        ensbuilder2._save_read_preds(read_preds_file)
+        assert save.call_count == 0
+    read_preds, _ = EnsembleBuilder._load_read_preds(read_preds_file)
+    compare_read_preds(read_preds, ensbuilder.read_preds)
+
+
+def test_read_losses_journal(ensemble_backend):
+    kwargs = dict(
+        backend=ensemble_backend,
+        dataset_name="TEST",
+        output_type=BINARY,
+        task_type=TABULAR_CLASSIFICATION,
+        metrics=[accuracy],
+        opt_metric='accuracy',
+        seed=0,  # important to find the test files
+    )
+    ensbuilder = EnsembleBuilder(**kwargs)
+    ensbuilder.compute_loss_per_model()
+
+    # Without a snapshot, all losses are written to it
+    ensbuilder._save_read_losses()
+    assert os.path.exists(ensbuilder.ensemble_loss_file)
+    assert not os.path.exists(ensbuilder.ensemble_loss_journal)
+
+    # Later, only the changed entries are appended to the journal
+    k = list(ensbuilder.read_losses.keys())[0]
+    ensbuilder.read_losses[k]["loaded"] = 3
+    with unittest.mock.patch.object(ensbuilder, '_save_losses_npz') as save_npz:
+        ensbuilder._save_read_losses()
+        ensbuilder._save_read_losses()
+        assert save_npz.call_count == 0
+    with open(ensbuilder.ensemble_loss_journal) as fp:
+        assert len(fp.readlines()) == 1
+
+    # A new builder replays the journal over the snapshot
+    ensbuilder2 = EnsembleBuilder(**kwargs)
+    assert ensbuilder2._journal_length == 1
+    compare_read_preds(ensbuilder2.read_losses, ensbuilder.read_losses)
+
+    # Once the journal is long enough, a new snapshot replaces it
+    ensbuilder2._journal_length = MAX_LOSSES_JOURNAL_LENGTH
+    ensbuilder2._save_read_losses()
+    assert not os.path.exists(ensbuilder.ensemble_loss_journal)
+    read_losses, journal_length, _ = EnsembleBuilder._load_read_losses(
+        ensbuilder.ensemble_loss_file, ensbuilder.ensemble_loss_journal
+    )
+    assert journal_length == 0
+    compare_read_preds(read_losses, ensbuilder.read_losses)
+
+
+def test_read_losses_truncated_snapshot(ensemble_backend):
+    kwargs = dict(
+        backend=ensemble_backend,
+        dataset_name="TEST",
+        output_type=BINARY,
+        task_type=TABULAR_CLASSIFICATION,
+        metrics=[accuracy],
+        opt_metric='accuracy',
+        seed=0,  # important to find the test files
+    )
+    ensbuilder = EnsembleBuilder(**kwargs)
+    ensbuilder.compute_loss_per_model()
+    ensbuilder._save_read_losses()
+
+    # An interrupted write of the snapshot leaves the previous one in place
+    with unittest.mock.patch('numpy.savez', side_effect=KeyboardInterrupt):
+        ensbuilder._journal_length = MAX_LOSSES_JOURNAL_LENGTH
+        with pytest.raises(KeyboardInterrupt):
+            ensbuilder._save_read_losses()
+    read_losses, _, _ = EnsembleBuilder._load_read_losses(
+        ensbuilder.ensemble_loss_file, ensbuilder.ensemble_loss_journal
+    )
+    compare_read_preds(read_losses, ensbuilder.read_losses)
+
+    # A snapshot that cannot be read is replaced at the next save
+    with open(ensbuilder.ensemble_loss_file, 'r+b') as fp:
+        fp.truncate(os.path.getsize(ensbuilder.ensemble_loss_file) // 2)
+    ensbuilder2 = EnsembleBuilder(**kwargs)
+    assert ensbuilder2.read_losses == {}
+    assert ensbuilder2._journal_length == MAX_LOSSES_JOURNAL_LENGTH
+    ensbuilder2.compute_loss_per_model()
+    ensbuilder2._save_read_losses()
+    read_losses, journal_length, _ = EnsembleBuilder._load_read_losses(
+        ensbuilder.ensemble_loss_file, ensbuilder.ensemble_loss_journal
+    )
+    assert journal_length == 0
+    compare_read_preds(read_losses, ensbuilder2.read_losses)
+
+
+def test_read_losses_torn_journal(ensemble_backend):
+    kwargs = dict(
+        backend=ensemble_backend,
+        dataset_name="TEST",
+        output_type=BINARY,
+        task_type=TABULAR_CLASSIFICATION,
+        metrics=[accuracy],
+        opt_metric='accuracy',
+        seed=0,  # important to find the test files
+    )
+    ensbuilder = EnsembleBuilder(**kwargs)
+    ensbuilder.compute_loss_per_model()
+    ensbuilder._save_read_losses()
+    keys = list(ensbuilder.read_losses.keys())
+
+    # The first change is journaled completely, the second one is torn
+    ensbuilder.read_losses[keys[0]]["loaded"] = 3
+    ensbuilder._save_read_losses()
+    with open(ensbuilder.ensemble_loss_journal, 'a') as fp:
+        fp.write('{"snapshot": "')
+
+    # The replay stops at the torn line and the next save writes a new snapshot
+    ensbuilder2 = EnsembleBuilder(**kwargs)
+    assert ensbuilder2.read_losses[keys[0]]["loaded"] == 3
+    assert ensbuilder2._journal_length == MAX_LOSSES_JOURNAL_LENGTH
+    ensbuilder2.read_losses[keys[1]]["loaded"] = 3
+    ensbuilder2._save_read_losses()
+    assert not os.path.exists(ensbuilder.ensemble_loss_journal)
+
+    # Later changes are journaled and restored again
+    ensbuilder3 = EnsembleBuilder(**kwargs)
+    compare_read_preds(ensbuilder3.read_losses, ensbuilder2.read_losses)
+    ensbuilder3.read_losses[keys[2]]["loaded"] = 3
+    ensbuilder3._save_read_losses()
+    ensbuilder4 = EnsembleBuilder(**kwargs)
+    assert ensbuilder4._journal_length == 1
+    compare_read_preds(ensbuilder4.read_losses, ensbuilder3.read_losses)
+
+    # Lines of an older snapshot, left behind by an interrupted compaction, are skipped
+    stale = ensbuilder4._snapshot_id
+    ensbuilder4._journal_length = MAX_LOSSES_JOURNAL_LENGTH
+    with unittest.mock.patch('os.remove'):
+        ensbuilder4._save_read_losses()
+    assert ensbuilder4._snapshot_id != stale
+    ensbuilder5 = EnsembleBuilder(**kwargs)
+    assert ensbuilder5._journal_length == MAX_LOSSES_JOURNAL_LENGTH
+    compare_read_preds(ensbuilder5.read_losses, ensbuilder4.read_losses)
+
 
 def test_ensemble_builder_process_realrun(dask_client, ensemble_backend):
     manager = EnsembleBuilderManager(
@@ -723,7 +1269,7 @@ def test_ensemble_builder_nbest_remembered(fit_ensemble, ensemble_backend, dask_
     future = manager.futures[0]
     dask.distributed.wait([future])  # wait for the ensemble process to finish
     assert future.result() == ([], 5, None, None), vars(future.result())
-    file_path = os.path.join(ensemble_backend.internals_directory, 'ensemble_read_preds.pkl')
+    file_path = os.path.join(ensemble_backend.internals_directory, 'ensemble_read_preds')
     assert not os.path.exists(file_path)
 
     manager.build_ensemble(dask_client, unit_test=True)
@@ -769,6 +1315,12 @@ def testPredict():
                       [0.35, 0.65]])
     assert np.allclose(pred, truth)
 
+    # The same predictions given as a list, zero-weight models are ignored
+    ensemble.weights_ = [0.7, 0.2, 0.0, 0.1]
+    pred = ensemble.predict([per_model_pred[0], per_model_pred[1],
+                             np.full((2, 2), np.nan), per_model_pred[2]])
+    assert np.allclose(pred, truth)
+
     # Test for case 2.
     per_model_pred = np.array([
         [[0.9, 0.1],
@@ -785,6 +1337,10 @@ def testPredict():
                       [0.35, 0.65]])
     assert np.allclose(pred, truth)
 
+    # The same predictions given as a list
+    pred = ensemble.predict(list(per_model_pred))
+    assert np.allclose(pred, truth)
+
     # Test for error case.
     per_model_pred = np.array([
         [[0.9, 0.1],
@@ -802,6 +1358,34 @@ def testPredict():
         ensemble.predict(per_model_pred)
 
 
+def testFitAccuracyMatchesCalculateLoss():
+    # The accuracy shortcut of the ensemble selection must pick the same
+    # models with the same losses as the generic calculate_loss
+    rng = np.random.RandomState(1)
+    labels = rng.randint(0, 3, size=50)
+    predictions = [rng.dirichlet(np.ones(3), size=50) for _ in range(6)]
+
+    def fit(**kwargs):
+        ensemble = EnsembleSelection(ensemble_size=10,
+                                     random_state=np.random.RandomState(0),
+                                     metric=accuracy,
+                                     task_type=TABULAR_CLASSIFICATION,
+                                     )
+        with unittest.mock.patch('autoPyTorch.ensemble.ensemble_selection.calculate_loss',
+                                 wraps=calculate_loss) as mocked, \
+                unittest.mock.patch('autoPyTorch.ensemble.ensemble_selection.get_accuracy_labels',
+                                    **kwargs):
+            ensemble.fit(predictions, labels, identifiers=[(1, i, 0.0) for i in range(6)])
+        return ensemble, mocked.call_count
+
+    fast, fast_calls = fit(wraps=get_accuracy_labels)
+    slow, slow_calls = fit(return_value=None)
+    assert fast_calls == 0
+    assert slow_calls > 0
+    assert fast.indices_ == slow.indices_
+    assert np.allclose(fast.trajectory_, slow.trajectory_)
+
+
 # -----------------------------------------------------------------------------------------------
 #                                   SingleBest Testing
 # -----------------------------------------------------------------------------------------------
@@ -1,4 +1,5 @@
 import copy
+import unittest.mock
 from typing import Any, Dict, Optional, Tuple
 
 from ConfigSpace.configuration_space import ConfigurationSpace
@@ -445,6 +446,43 @@ class TestNetworkBackbone:
         # clear addons
         base_network_backbone_choice._addons = ThirdPartyComponents(NetworkBackboneComponent)
 
+    def test_add_network_backbone_after_get_components(self):
+        """Makes sure that a backbone added after the components were cached is available"""
+        network_backbone_choice = NetworkBackboneChoice(dataset_properties={})
+        components = network_backbone_choice.get_components()
+        assert "DummyBackbone" not in components
+        assert network_backbone_choice.get_components() is components
+
+        base_network_backbone_choice.add_backbone(DummyBackbone)
+        try:
+            assert network_backbone_choice.get_components()["DummyBackbone"] is DummyBackbone
+
+            # A backbone added again under the same name replaces the former one
+            redefined = type("DummyBackbone", (NetworkBackboneComponent,),
+                             {"get_properties": staticmethod(DummyBackbone.get_properties)})
+            base_network_backbone_choice.add_backbone(redefined)
+            assert network_backbone_choice.get_components()["DummyBackbone"] is redefined
+        finally:
+            # clear addons
+            base_network_backbone_choice._addons = ThirdPartyComponents(NetworkBackboneComponent)
+        assert "DummyBackbone" not in network_backbone_choice.get_components()
+
+    def test_handles_task_type(self):
+        """Makes sure that backbones are filtered by task type, reading their properties once per task type"""
+        get_properties = unittest.mock.Mock(return_value=dict(DummyBackbone.get_properties(), handles_image=False))
+        tabular_backbone = type("TabularBackbone", (NetworkBackboneComponent,),
+                                {"get_properties": staticmethod(get_properties)})
+
+        for _ in range(2):
+            assert base_network_backbone_choice._handles_task_type(tabular_backbone, "tabular_classification")
+            assert not base_network_backbone_choice._handles_task_type(tabular_backbone, "image_classification")
+        assert get_properties.call_count == 2
+
+        available = NetworkBackboneChoice(dataset_properties={}).get_available_components(
+            dataset_properties={"task_type": "image_classification"})
+        assert "ConvNetImageBackbone" in available
+        assert "MLPBackbone" not in available
+
     @pytest.mark.parametrize('resnet_shape', ['funnel', 'long_funnel',
                                               'diamond', 'hexagon',
                                               'brick', 'triangle',
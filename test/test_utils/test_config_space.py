@@ -0,0 +1,71 @@
+"""
+This tests the functionality in autoPyTorch/utils/config_space.
+"""
+import itertools
+import unittest.mock
+
+import ConfigSpace.hyperparameters as CSH
+
+import numpy as np
+
+from autoPyTorch.utils import config_space
+from autoPyTorch.utils.config_space import CustomConfiguration, CustomConfigurationSpace, convert_np_types
+
+
+def _get_config_space() -> CustomConfigurationSpace:
+    cs = CustomConfigurationSpace(seed=1)
+    for i in range(10):
+        cs.add_hyperparameter(CSH.UniformFloatHyperparameter('x{}'.format(i), 0, 1))
+    return cs
+
+
+def test_one_exchange_neighbourhood_is_lazy():
+    """
+    Makes sure that neighbours are only created as they are consumed,
+    so that capping the neighbourhood with islice saves creating the rest
+    """
+    configuration = _get_config_space().get_default_configuration()
+    created = []
+    smac_get_one_exchange_neighbourhood = config_space.smac_get_one_exchange_neighbourhood
+
+    def get_neighbourhood(**kwargs):
+        for neighbour in smac_get_one_exchange_neighbourhood(**kwargs):
+            created.append(neighbour)
+            yield neighbour
+
+    with unittest.mock.patch.object(config_space, 'smac_get_one_exchange_neighbourhood', get_neighbourhood):
+        neighbours = list(itertools.islice(
+            config_space.get_one_exchange_neighbourhood(configuration, seed=1), 3))
+
+    assert len(neighbours) == 3
+    assert len(created) == 3
+    assert all(type(neighbour) is CustomConfiguration for neighbour in neighbours)
+
+
+def test_convert_np_types_object_array():
+    """Makes sure that the elements of object arrays are converted as well"""
+    array = np.array([np.int64(1), np.float32(0.5), np.str_('a'), [np.bool_(True)], None], dtype=object)
+    converted = convert_np_types(array)
+
+    assert converted == [1, 0.5, 'a', [True], None]
+    assert [type(value) for value in converted] == [int, float, str, list, type(None)]
+    assert type(converted[3][0]) is bool
+
+
+def test_sample_configuration_returns_custom_configurations():
+    """Makes sure that single and multiple samples are CustomConfigurations"""
+    cs = _get_config_space()
+
+    configuration = cs.sample_configuration()
+    assert type(configuration) is CustomConfiguration
+    assert configuration.configuration_space is cs
+    assert type(configuration['x0']) is float
+
+    configurations = cs.sample_configuration(size=3)
+    assert isinstance(configurations, list)
+    assert len(configurations) == 3
+    assert all(type(config) is CustomConfiguration for config in configurations)
+    assert all(config.configuration_space is cs for config in configurations)
+
+    # Casting again leaves a configuration as it is
+    assert CustomConfiguration.cast(configuration) is configuration